@@ -641,24 +641,39 @@ def same_direction(v1, v2, v3, axis):
 def reproject_refractive(xyz, camera, water_level=0, normal=(0, 0, 1), refractive_index=1.333):
     """
     variable names follwoing https://ieeexplore.ieee.org/document/5957554, figure 1
+
+    Args:
+        xyz (`numpy.ndarray`): the 3D location of one point, shape (3,),\
+            or the locations of many points, shape (n, 3)
+        camera (Camera): the camera above the water
+
+    Return:
+        `numpy.ndarray`: the reprojected 2D location(s), shape (2,) or (n, 2)
     """
-    co = camera.o
+    xyz = np.asarray(xyz, dtype=np.float64)
+    points = xyz.reshape(-1, 3)
+    if len(points) == 0:
+        return np.empty((0, 2))
+    co = np.ravel(camera.o)
     d = co[-1] - water_level
-    x = np.linalg.norm(co[:2] - xyz[:2])
-    z = abs(xyz[-1] - water_level)
-    u = get_u(refractive_index, d, x, z).ravel()
-    o = np.hstack((co[:2].ravel(), water_level))
-    oq_vec = np.hstack((xyz[:2], water_level)) - o
-    oq_vec /= np.linalg.norm(oq_vec)
-    poi = o + u * oq_vec
+    oq_vec = points[:, :2] - co[:2]  # o and q on the water surface
+    x = np.linalg.norm(oq_vec, axis=1)
+    z = np.abs(points[:, -1] - water_level)
+    u = np.array([get_u(refractive_index, d, xi, zi) for xi, zi in zip(x, z)])
+    poi = np.empty((len(points), 3))
+    poi[:, :2] = co[:2] + (u / x)[:, np.newaxis] * oq_vec
+    poi[:, 2] = water_level
     uv, _ = cv2.projectPoints(
-            objectPoints=np.vstack(poi).T,
+            objectPoints=poi,
             rvec=camera.rotation.as_rotvec(),
             tvec=camera.t,
             cameraMatrix=camera.k,
             distCoeffs=camera.distortion
     )
-    return uv.ravel()
+    uv = uv.reshape(-1, 2)
+    if xyz.ndim == 1:
+        return uv[0]
+    return uv
 
 
 def reproject_refractive_no_distort(xyz, camera, water_level=0, normal=(0, 0, 1), refractive_index=1.333):
@@ -197,14 +197,14 @@ def greedy_match(
 
         for j, cluster in enumerate(clusters[1]):
             distances = np.abs(
-                cluster.T[0] * a12 - cluster.T[1] + b12
+                cluster[:, 0] * a12 - cluster[:, 1] + b12
             ) / np.sqrt(a12**2 + 1)
             if np.min(distances) < tol_2d:
                 candidates_12.append(j)
 
         for j, cluster in enumerate(clusters[2]):
             distances = np.abs(
-                cluster.T[0] * a13 - cluster.T[1] + b13
+                cluster[:, 0] * a13 - cluster[:, 1] + b13
             ) / np.sqrt(a13**2 + 1)
             if np.min(distances) < tol_2d:
                 candidates_13.append(j)
@@ -226,7 +226,7 @@ def greedy_match(
             for c3 in candidates_13:
                 cluster = clusters[2][c3]
                 distances = np.abs(
-                        cluster.T[0] * a23 - cluster.T[1] + b23
+                        cluster[:, 0] * a23 - cluster[:, 1] + b23
                         ) / np.sqrt(a23**2 + 1)
                 if np.min(distances) < tol_2d:
                     to_delete[j] = False
@@ -248,7 +248,7 @@ def greedy_match(
             for c2 in candidates_12:
                 cluster = clusters[1][c2]
                 distances = np.abs(
-                        cluster.T[0] * a32 - cluster.T[1] + b32
+                        cluster[:, 0] * a32 - cluster[:, 1] + b32
                         ) / np.sqrt(a32**2 + 1)
                 if np.min(distances) < tol_2d:
                     to_delete[j] = False
@@ -280,7 +280,7 @@ def greedy_match(
             )
 
             # weighted by inverse error
-            z = np.sum(cloud.T[-1] / error) / np.sum(1/error)
+            z = np.sum(cloud[:, -1] / error) / np.sum(1/error)
             in_tank = (z < water_level) and (z > -depth)
             in_tank = True
 
@@ -1,13 +1,17 @@
 import cv2
 import numpy as np
+from functools import lru_cache
 from tqdm import tqdm
-from numba import njit
+import numba
+from numba import njit, prange, get_num_threads, set_num_threads
+from scipy.spatial import cKDTree
 from scipy.spatial.distance import pdist, squareform
 from typing import List
 from joblib import Parallel, delayed
 from scipy import ndimage
-from scipy.optimize import minimize
+from scipy.optimize import minimize, least_squares
 from scipy.spatial.transform import Rotation
+from scipy.sparse import coo_matrix
 from scipy.sparse.csgraph import connected_components
 import matplotlib.pyplot as plt
 from matplotlib.path import Path
@@ -15,11 +19,11 @@ from matplotlib.patches import PathPatch
 from matplotlib.colors import ListedColormap
 import mpl_toolkits.mplot3d.art3d as art3d
 from . import ray_trace
-from .cutility import join_pairs
 from .cstereo import match_v3, refractive_triangulate
 from .cgreta import get_trajs_3d_t1t2, get_trajs_3d_t1t2t3, get_trajs_3d
 from .camera import Camera
 from .ellipse import cost_conic, cost_conic_triple, cost_circle_triple
+from .ellipse import residual_conic, residual_conic_triple, residual_circle_triple
 from docplex.mp.model import Model
 from itertools import product
 
@@ -85,9 +89,8 @@ def plot_reproject_with_roi(
     ax = fig.add_subplot(111)
     ax.imshow(image, cmap='gray')
 
-    for point in pos_3d:
-        xy = ray_trace.reproject_refractive(point, camera)
-        ax.scatter(*xy, color='tomato', marker='+', lw=1, s=128)
+    pos_2d = ray_trace.reproject_refractive(np.reshape(pos_3d, (-1, 3)), camera)
+    ax.scatter(*pos_2d.T, color='tomato', marker='+', lw=1, s=128)
 
     ax.scatter(
             features[0] + roi[1].start, features[1] + roi[0].start,
@@ -107,27 +110,67 @@ def plot_reproject_with_roi(
     plt.close()
 
 
+def __label_binary(binary):
+    """
+    label the connected parts in a binary image, the connectivity is the\
+        same as the default of :func:`scipy.ndimage.label`
+
+    2D images were labelled with the (faster) OpenCV implementation, which\
+        also counts the size of each label in the same pass
+
+    Args:
+        binary (:obj:`numpy.ndarray`): the binary image of any dimension
+
+    Return:
+        :obj:`tuple`: the labels (0 is the background), and the number of\
+            pixels of each label
+    """
+    if binary.ndim == 2:
+        _, labels, stats, _ = cv2.connectedComponentsWithStats(
+            binary.astype(np.uint8), connectivity=4, ltype=cv2.CV_32S
+        )
+        sizes = stats[:, cv2.CC_STAT_AREA]
+    else:
+        labels, _ = ndimage.label(binary)
+        sizes = np.bincount(labels.ravel())
+    return labels, sizes
+
+
 def get_clusters(image, threshold, min_size, roi):
     """
     apply threshold to image and label disconnected part
     small labels (size < min_size) were erased
     the coordinates of labels were returned, shape: (label_number, 3)
-    """
-    binary = image > (image[roi].max() * threshold)
-    mask = np.zeros(image.shape, dtype=int)
-    mask[roi] = 1
-    labels, _ = ndimage.label(binary)
-    labels *= mask
-    counted = np.bincount(labels.ravel())
-    noise_indice = np.where(counted < min_size)
-    mask = np.in1d(labels, noise_indice).reshape(image.shape)
-    labels[mask] = 0
-    labels, _ = ndimage.label(labels)
+
+    Args:
+        image (:obj:`numpy.ndarray`): the image to be thresholded
+        threshold (:obj:`float`): pixels brighter than\
+            ``max(image[roi]) * threshold`` were considered as foreground
+        min_size (:obj:`int`): the minimum number of pixels of a cluster
+        roi (:obj:`tuple` or :obj:`numpy.ndarray`): the region of interest,\
+            either a tuple of slices or a boolean mask with the same shape\
+            as the image. Only the pixels inside the roi were labelled
+    """
+    if isinstance(roi, np.ndarray) and roi.dtype == bool:
+        roi_mask = roi
+        roi_max = np.max(image, where=roi_mask, initial=image.min())
+    else:
+        roi_mask = np.zeros(image.shape, dtype=bool)
+        roi_mask[roi] = True
+        roi_max = image[roi].max()  # slicing gives a view, not a copy
+    binary = image > (roi_max * threshold)
+    binary &= roi_mask
+    labels, sizes = __label_binary(binary)
+    is_kept = sizes >= min_size  # lookup table indexed by label
+    is_kept[0] = False
     clusters = []
-    for value in np.unique(labels.ravel()):
-        if value > 0:
-            cluster = np.array(np.where(labels == value)).T
-            clusters.append(cluster)
+    # only scan the bounding box of each label, not the entire image
+    for value, region in enumerate(ndimage.find_objects(labels), start=1):
+        if (region is None) or (not is_kept[value]):
+            continue
+        offset = np.array([s.start for s in region])
+        cluster = np.argwhere(labels[region] == value) + offset
+        clusters.append(cluster)
     return clusters
 
 
@@ -176,28 +219,15 @@ def get_ABCD(corners, width, excess_rows) -> dict:
     Return:
         `dict`: the locations of A, B, C, D respectively.
     """
-    points_Ah, points_Bh, points_Ch, points_Dh = [], [], [], []
-    for er in range(excess_rows + 1):
-        start_AB = er * width
-        start_CD = start_AB + width * (width - 1)
-        offset = width - 1
-        A = corners[start_AB].tolist()
-        B = corners[start_AB + offset].tolist()
-        C = corners[start_CD].tolist()
-        D = corners[start_CD + offset].tolist()
-        # collect the points
-        Ah = A + [1]
-        Bh = B + [1]
-        Ch = C + [1]
-        Dh = D + [1]
-        points_Ah.append(Ah)  # (n, 3)
-        points_Bh.append(Bh)  # (n, 3)
-        points_Ch.append(Ch)  # (n, 3)
-        points_Dh.append(Dh)  # (n, 3)
-    ABCD = {'A': np.array(points_Ah),
-            'B': np.array(points_Bh),
-            'C': np.array(points_Ch),
-            'D': np.array(points_Dh)}
+    idx_A = np.arange(excess_rows + 1) * width
+    idx_B = idx_A + width - 1
+    idx_C = idx_A + width * (width - 1)
+    idx_D = idx_C + width - 1
+    ones = np.ones((len(idx_A), 1))
+    ABCD = {
+        letter: np.hstack((corners[idx], ones))  # (n, 3)
+        for letter, idx in zip('ABCD', (idx_A, idx_B, idx_C, idx_D))
+    }
     return ABCD
 
 
@@ -279,23 +309,20 @@ def get_similarity(abcd, H_aff):
     lAD = (lAD / lAD[:, -1][:, None])[:, :2]
     lBC = (lBC / lBC[:, -1][:, None])[:, :2]
     # solve circular point constrain from 2 pp lines
-    s11_ensemble, s12_ensemble = [], []
-    M = np.empty((2, 3))
-    for i in range(len(abcd['A'])):  # for different "point A"
-        M[0, 0] = lAB[i, 0] * lAC[i, 0]
-        M[0, 1] = lAB[i, 0] * lAC[i, 1] + lAB[i, 1] * lAC[i, 0]
-        M[0, 2] = lAB[i, 1] * lAC[i, 1]
-        M[1, 0] = lAD[i, 0] * lBC[i, 0]
-        M[1, 1] = lAD[i, 0] * lBC[i, 1] + lAD[i, 1] * lBC[i, 0]
-        M[1, 2] = lAD[i, 1] * lBC[i, 1]
-        s11, s12 = np.linalg.solve(M[:, :2], -M[:, -1])
-        s11_ensemble.append(s11)
-        s12_ensemble.append(s12)
+    M = np.empty((len(abcd['A']), 2, 3))  # for different "point A"
+    M[:, 0, 0] = lAB[:, 0] * lAC[:, 0]
+    M[:, 0, 1] = lAB[:, 0] * lAC[:, 1] + lAB[:, 1] * lAC[:, 0]
+    M[:, 0, 2] = lAB[:, 1] * lAC[:, 1]
+    M[:, 1, 0] = lAD[:, 0] * lBC[:, 0]
+    M[:, 1, 1] = lAD[:, 0] * lBC[:, 1] + lAD[:, 1] * lBC[:, 0]
+    M[:, 1, 2] = lAD[:, 1] * lBC[:, 1]
+    s_ensemble = np.linalg.solve(M[:, :, :2], -M[:, :, 2:])[:, :, 0]  # (n, 2)
+    s11_mean, s12_mean = s_ensemble.mean(axis=0)
     S = np.array([
-            [np.mean(s11_ensemble), np.mean(s12_ensemble)],
-            [np.mean(s12_ensemble), 1],
+            [s11_mean, s12_mean],
+            [s12_mean, 1],
         ])
-    S = S / max(s11, 1)  # not scaling up the coordinates
+    S = S / max(s_ensemble[-1, 0], 1)  # not scaling up the coordinates
     K = np.linalg.cholesky(S)
     Hs_inv = np.array([  # from similar to affine
         [K[0, 0], K[0, 1], 0],
@@ -361,42 +388,20 @@ def get_homography(camera, angle_num=10):
             times for calculation
     """
     angles = np.linspace(0, np.pi/2, angle_num)  # rotation_angle
+    cos, sin = np.cos(angles)[:, None], np.sin(angles)[:, None]
 
-    abcd = {
-        'A': np.empty((angle_num, 3)),
-        'B': np.empty((angle_num, 3)),
-        'C': np.empty((angle_num, 3)),
-        'D': np.empty((angle_num, 3)),
-    }
-
-    for i, t in enumerate(angles):
-        R = np.array((  # rotation matrix pp z-axis
-            (np.cos(t), -np.sin(t), 0),
-            (np.sin(t), np.cos(t), 0),
-            (0, 0, 1)
-        ), dtype=np.float32)
-
-        abcd_3d = np.array((  # shape (3 dim, 4 corners)
-            (0, 0, 0),
-            (1, 0, 0),
-            (0, 1, 0),
-            (1, 1, 0),
-        ), dtype=np.float32).T
-
-        abcd_3d[:2, :] -= abcd_3d[:2, :].mean(axis=1)[:, np.newaxis]
+    # the corners A, B, C, D of a unit chessboard centred at the origin
+    corners = np.array(((-0.5, -0.5), (0.5, -0.5), (-0.5, 0.5), (0.5, 0.5)))
 
-        abcd_3d_rot = R @ abcd_3d  # shape (3 dim, 4 corners)
+    # rotate the chessboard pp z-axis, shape (angles, 4 corners, 4 dim)
+    abcd_3dh = np.zeros((angle_num, 4, 4))
+    abcd_3dh[..., 0] = cos * corners[:, 0] - sin * corners[:, 1]
+    abcd_3dh[..., 1] = sin * corners[:, 0] + cos * corners[:, 1]
+    abcd_3dh[..., 3] = 1
 
-        # shape (4 dim, 4 corners)
-        abcd_3d_rot_h = np.vstack((abcd_3d_rot, np.ones((1, 4))))
-
-        abcd_2dh = camera.p @ abcd_3d_rot_h
-        abcd_2dh = (abcd_2dh / abcd_2dh[-1, :]).T  # shape (4 corners, 3 dim)
-
-        abcd['A'][i] = abcd_2dh[0]
-        abcd['B'][i] = abcd_2dh[1]
-        abcd['C'][i] = abcd_2dh[2]
-        abcd['D'][i] = abcd_2dh[3]
+    abcd_2dh = abcd_3dh @ camera.p.T  # shape (angles, 4 corners, 3 dim)
+    abcd_2dh /= abcd_2dh[..., -1:]
+    abcd = {letter: abcd_2dh[:, i] for i, letter in enumerate('ABCD')}
 
     H_aff = get_affinity(abcd)
     H_sim = get_similarity(abcd, H_aff) @ H_aff
@@ -420,23 +425,15 @@ def update_orientation(orientations, locations, H, length=10):
     Return:
         `numpy.ndarray`: the recitified orientations
     """
-    orient_rec = []
-    for o, xy in zip(orientations, locations):
-        p1h = np.array((
-            xy[0] - length * np.sin(o),
-            xy[1] - length * np.cos(o), 1
-        ))
-        p2h = np.array((
-            xy[0] + length * np.sin(o),
-            xy[1] + length * np.cos(o), 1
-        ))
-        p1h = H @ p1h
-        p2h = H @ p2h
-        p1 = (p1h / p1h[-1])[:2]
-        p2 = (p2h / p2h[-1])[:2]
-        o_rec = np.arctan2(*(p2 - p1))
-        orient_rec.append(o_rec)
-    orient_rec = np.array(orient_rec)
+    orientations = np.asarray(orientations, dtype=float)
+    locations = np.asarray(locations, dtype=float).reshape(-1, 2)
+    shift = length * np.array((np.sin(orientations), np.cos(orientations)))
+    ones = np.ones((1, len(orientations)))
+    p1h = H @ np.vstack((locations.T - shift, ones))  # (3, n)
+    p2h = H @ np.vstack((locations.T + shift, ones))
+    p1 = p1h[:2] / p1h[-1]
+    p2 = p2h[:2] / p2h[-1]
+    orient_rec = np.arctan2(*(p2 - p1))
     orient_rec[orient_rec < 0] += np.pi
     orient_rec[orient_rec > np.pi] -= np.pi
     return orient_rec
@@ -454,16 +451,14 @@ def get_orient_line(locations, orientations, length=10):
     oline_1 = locations - length * unit_vector
     oline_2 = locations + length * unit_vector
 
-    olines_x = []
-    olines_y = []
+    # [start, end, nan] for each fish, the nan breaks the lines in plot
+    olines = np.empty((2, 3 * oline_1.shape[1]))
+    olines[:, 0::3] = oline_1
+    olines[:, 1::3] = oline_2
+    olines[:, 2::3] = np.nan
+    return olines
 
-    for i in range(oline_1.shape[1]):
-        olines_x += [oline_1[0, i], oline_2[0, i], np.nan]
-        olines_y += [oline_1[1, i], oline_2[1, i], np.nan]
-    return np.array((olines_x, olines_y))
 
-
-@njit(fastmath=True)
 def polar_chop(image, H_sim, centre, radius, n_angle, n_radius, dist_coef, k):
     """
     Chop an image in the polar coordinates
@@ -485,8 +480,35 @@ def polar_chop(image, H_sim, centre, radius, n_angle, n_radius, dist_coef, k):
         `numpy.array`: labelled image where each chopped regions were labelled\
             with different values
     """
-    # setting up bin edges
-    be_angle = np.linspace(0, 2 * np.pi, n_angle+1)  # bin_edge
+    height, width = image.shape[:2]
+    labels = __get_polar_labels(
+        height, width,
+        np.asarray(H_sim, dtype=np.float64).tobytes(),
+        np.asarray(centre, dtype=np.float64).tobytes(),
+        radius, n_angle, n_radius,
+        np.asarray(dist_coef, dtype=np.float64).tobytes(),
+        np.asarray(k, dtype=np.float64).tobytes(),
+    )
+    return labels.copy()
+
+
+@lru_cache(maxsize=4)  # one full-frame label image per view
+def __get_polar_labels(
+        height, width, H_sim_bytes, centre_bytes, radius, n_angle, n_radius,
+        dist_coef_bytes, k_bytes
+):
+    """
+    Calculate the labels of :any:`polar_chop` from the raw bytes of the\
+        float64 arrays, so that the labels of one camera setup are only\
+        calculated once. Only a few setups are cached, as each entry\
+        holds an image of the full frame
+    """
+    H_sim = np.frombuffer(H_sim_bytes).reshape(3, 3)
+    centre = np.frombuffer(centre_bytes)
+    dist_coef = np.frombuffer(dist_coef_bytes)
+    k = np.frombuffer(k_bytes).reshape(3, 3)
+
+    # setting up bin edges, the angular bins are uniform
     r0 = np.sqrt(radius**2 / (n_angle * (n_radius-1) + 1))
     be_radius = np.empty(n_radius+1)
     be_radius[0] = 0
@@ -495,53 +517,35 @@ def polar_chop(image, H_sim, centre, radius, n_angle, n_radius, dist_coef, k):
         be_radius[i] = np.sqrt(((i-1) * n_angle + 1))* r0
     be_r2 = be_radius ** 2
 
-    # getting camera parameters
-    k1, k2, p1, p2, k3 = dist_coef
-    fx, fy, cx, cy = k[0, 0], k[1, 1], k[0, 2], k[1, 2]
-
-    result = np.empty(image.shape, dtype=np.uint64)
-    for x in range(image.shape[1]):  # x -> col
-        for y in range(image.shape[0]):  # y -> row!
-            # undistort x, y, shamelessly copied from opencv
-            x0 = (x - cx) / fx
-            y0 = (y - cy) / fy
-            x_ud, y_ud = x0, y0  # ud -> undistorted
-            for _ in range(5):  # iter 5 times
-                r2 = x_ud**2 + y_ud ** 2
-                k_inv = 1 / (1 + k1 * r2 + k2 * r2**2 + k3 * r2**3)
-                delta_x = 2 * p1 * x_ud*y_ud + p2 * (r2 + 2 * x_ud**2)
-                delta_y = p1 * (r2 + 2 * y_ud**2) + 2 * p2 * x_ud*y_ud
-                x_ud = (x0 - delta_x) * k_inv
-                y_ud = (y0 - delta_y) * k_inv
-            x_ud = x_ud * fx + cx
-            y_ud = y_ud * fy + cy
-
-            # similar rectification
-            xyh = np.array([x_ud, y_ud, 1], dtype=np.float64)
-            xyh_sim = H_sim @ xyh
-            xy_sim = (xyh_sim / xyh_sim[-1])[:2]  # similar trasnformed
-            x_sim, y_sim = xy_sim - centre
-
-            # work in polar coordinates
-            t = np.arctan2(y_sim, x_sim) + np.pi  # theta
-            r2 = x_sim**2 + y_sim**2
-
-            # label the image
-            if r2 <= be_r2[1]:  # assign central part to value 1
-                result[y, x] = 1
-            elif r2 <= be_r2[-1]:
-                idx_angle, idx_radius = 0, 0
-                for i, a in enumerate(be_angle[1:]):
-                    if (t < a) and (t >= be_angle[i]):
-                        idx_angle = i
-                for j, r2e in enumerate(be_r2[1:]):
-                    if (r2 < r2e) and (r2 >= be_r2[j]):
-                        idx_radius = j
-                idx_group = idx_angle + (idx_radius - 1) * n_angle + 2
-                result[y, x] = idx_group
-            else:
-                result[y, x] = 0
-    return result
+    # undistort all the pixels at once, opencv iterates 5 times by default
+    ys, xs = np.mgrid[:height, :width]  # x -> col, y -> row!
+    pixels = np.stack((xs.ravel(), ys.ravel()), axis=1).astype(np.float64)
+    xy_ud = cv2.undistortPoints(
+        pixels[:, np.newaxis, :], k, dist_coef, P=k
+    )[:, 0, :]  # ud -> undistorted, shape (n, 2)
+    x_ud, y_ud = xy_ud.T
+
+    # similar rectification, without building the homogeneous coordinates
+    w_inv = 1.0 / (H_sim[2, 0] * x_ud + H_sim[2, 1] * y_ud + H_sim[2, 2])
+    x_sim = (H_sim[0, 0] * x_ud + H_sim[0, 1] * y_ud + H_sim[0, 2]) * w_inv
+    y_sim = (H_sim[1, 0] * x_ud + H_sim[1, 1] * y_ud + H_sim[1, 2]) * w_inv
+    x_sim -= centre[0]
+    y_sim -= centre[1]
+
+    # work in polar coordinates
+    t = np.arctan2(y_sim, x_sim) + np.pi  # theta
+    r2 = x_sim ** 2 + y_sim ** 2
+
+    # label the image, angle from uniform bins, radius with binary search
+    idx_angle = (t * (n_angle / (2 * np.pi))).astype(np.int64) % n_angle
+    idx_radius = np.minimum(
+        np.searchsorted(be_r2, r2, side='right') - 1, n_radius - 1
+    )
+    result = np.zeros(len(r2), dtype=np.uint64)  # outside is 0
+    is_ring = (r2 > be_r2[1]) & (r2 <= be_r2[-1])
+    result[is_ring] = idx_angle[is_ring] + (idx_radius[is_ring] - 1) * n_angle + 2
+    result[r2 <= be_r2[1]] = 1  # assign central part to value 1
+    return result.reshape((height, width))
 
 
 def get_polar_chop_spatial(radius, n_angle, n_radius):
@@ -577,13 +581,60 @@ def get_polar_chop_spatial(radius, n_angle, n_radius):
 
 
 def get_indices(labels):
-    indices = []
-    for val in set(np.ravel(labels)):
-        if val > 0:
-            indices.append(
-                np.array(np.where(labels.ravel() == val)[0])
-            )
-    return indices
+    """
+    Get the flat pixel indices of each labelled region
+
+    Args:
+        labels (`numpy.ndarray`): labelled image, 0 is the background
+
+    Return:
+        `list` of `numpy.ndarray`: the sorted flat indices of each region,\
+            ordered by the label values
+    """
+    flat = np.ravel(labels)
+    if len(flat) == 0:
+        return []
+    order = np.argsort(flat, kind='stable')  # indices sorted within a label
+    values = flat[order]
+    starts = np.flatnonzero(np.diff(values)) + 1
+    indices = np.split(order, starts)
+    values = values[np.concatenate(([0], starts))]
+    return [idx for val, idx in zip(values, indices) if val > 0]
+
+
+def __flatten_indices(indices):
+    """
+    Concatenate the pixel indices of all regions, so that the pixels of\
+        region i are flat[offsets[i] : offsets[i+1]]
+
+    Args:
+        indices (`list`): the flat pixel indices of each region,\
+            obtained from :any:`get_indices`
+
+    Return:
+        `tuple`: the concatenated indices and the offsets of each region
+    """
+    sizes = [len(idx) for idx in indices]
+    offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    if len(indices) == 0:
+        return np.empty(0, dtype=np.int64), offsets
+    return np.concatenate(indices), offsets
+
+
+@njit(parallel=True)
+def __get_region_means(data, flat, offsets):
+    """
+    Calculate the average value of the flat data inside each region
+    """
+    n_region = len(offsets) - 1
+    means = np.empty(n_region)
+    for i in prange(n_region):
+        total = 0.0
+        for j in range(offsets[i], offsets[i+1]):
+            total += data[flat[j]]
+        means[i] = total / (offsets[i+1] - offsets[i])
+    return means
 
 
 def box_count_polar_image(image, indices, invert=False, rawdata=False):
@@ -598,10 +649,7 @@ def box_count_polar_image(image, indices, invert=False, rawdata=False):
         data = image.max() - image.ravel()
     else:
         data = image.ravel()
-    intensities = np.empty(len(indices))
-    for i, idx in enumerate(indices):
-        pixels = data[idx]
-        intensities[i] = np.mean(pixels)
+    intensities = __get_region_means(data, *__flatten_indices(indices))
     if rawdata:
         return intensities
     else:
@@ -615,12 +663,27 @@ def box_count_polar_video(
         to_iter = tqdm(video)
     else:
         to_iter = video
-    indices = get_indices(labels)
-    results = Parallel(n_jobs=cores, require='sharedmem')(
-        delayed(
-            lambda x: box_count_polar_image(x, indices, invert, rawdata)
-        )(frame) for frame in to_iter
-    )
+    flat, offsets = __flatten_indices(get_indices(labels))
+    n_threads = get_num_threads()
+    set_num_threads(max(1, min(cores, numba.config.NUMBA_NUM_THREADS)))
+    results = []
+    try:
+        for frame in to_iter:
+            if invert:
+                data = frame.max() - frame.ravel()
+            else:
+                data = frame.ravel()
+            intensities = __get_region_means(data, flat, offsets)
+            if rawdata:
+                results.append(intensities)
+            else:
+                results.append((
+                    np.std(intensities),
+                    np.min(intensities),
+                    np.mean(intensities)
+                ))
+    finally:
+        set_num_threads(n_threads)
     return np.array(results).T  # (3, n)
 
 
@@ -635,22 +698,48 @@ def get_overlap_pairs(trajs, num, rtol):
     Return:
         `list` of `tuple`: the indices of overlapped objects
     """
-    N, T = len(trajs), len(trajs[0][0])
-    overlap_pairs = []
-    dist_mat = np.empty((N, N, T))
+    positions = np.stack([t[0] for t in trajs], axis=1)  # (T, N, 3)
+    N = positions.shape[1]
     rtol_sq = rtol * rtol
 
-    for i, t1 in enumerate(trajs):
-        for j, t2 in enumerate(trajs):
-            dist_mat[i, j] = np.sum(np.square(t1[0] - t2[0]), axis=1)
-
-    with np.errstate(invalid='ignore'):  # ignore the case like NAN < 5
-        adj_mat = np.sum(dist_mat < rtol_sq, axis=2) >= num
+    overlap_num = np.zeros((N, N), dtype=np.int64)
+    for frame in positions:
+        dist_sq = squareform(pdist(frame, 'sqeuclidean'))
+        with np.errstate(invalid='ignore'):  # ignore the case like NAN < 5
+            overlap_num += dist_sq < rtol_sq
 
-    adj_mat = np.triu(adj_mat, k=1)
+    adj_mat = np.triu(overlap_num >= num, k=1)
     return np.array(np.nonzero(adj_mat)).T
 
 
+def get_overlap_groups(trajs, num, rtol):
+    """
+    Group the trajectories that overlap, directly or through other\
+        trajectories, as connected components of the overlap graph
+
+    Args:
+        trajs (`list`): a collections of trajectories, each trajectory is
+            a tuple, containing (positions [N, 3], reprojection_error)
+        num (`int`): the maximum number of allowed overlapped objects
+        rtol (`float`): the minimum distance between two non-overlapped objects
+
+    Return:
+        `list` of `numpy.ndarray`: the indices of overlapped objects in\
+            each group, the objects without overlap are not included
+    """
+    pairs = get_overlap_pairs(trajs, num, rtol)
+    n_trajs = len(trajs)
+    adjacency = coo_matrix(
+        (np.ones(len(pairs), dtype=bool), (pairs[:, 0], pairs[:, 1])),
+        shape=(n_trajs, n_trajs)
+    )
+    n_groups, labels = connected_components(adjacency, directed=False)
+    order = np.argsort(labels, kind='stable')
+    sizes = np.bincount(labels, minlength=n_groups)
+    groups = np.split(order, np.cumsum(sizes)[:-1])
+    return [group for group in groups if len(group) > 1]
+
+
 def convert_traj_format(traj, t0):
     """
     Converting from (positions, error) to (time, positions)
@@ -665,26 +754,12 @@ def convert_traj_format(traj, t0):
         `list` of `tuple`: a list of ONE trajectory
             represented by (time, positions)
     """
-    # detect head NAN
-    was_nan = True
-    new_traj = [[], []]
+    is_nan = np.isnan(traj[0][:, 0])  # positions are NAN in all dimensions
+    is_valid_array = fill_hole_1d(~is_nan, size=3)
+    coordinates = interpolate_nan(traj[0], is_nan)
 
-    coordinates = traj[0].copy()
-    is_valid_array = np.logical_not(np.isnan(coordinates[:, 0]))
-    is_valid_array = fill_hole_1d(is_valid_array, size=3)
-    coordinates = interpolate_nan(coordinates)
-    coordinates[~is_valid_array] = np.nan
-
-    for t, coord in enumerate(coordinates):
-        is_nan = np.isnan(coord).any()
-        #if was_nan and (not is_nan):
-        #    new_trajs.append([[], []])
-        if (not is_nan):
-            new_traj[0].append(t0 + t)
-            new_traj[1].append(coord)
-        was_nan = is_nan
-
-    return [ (np.array(new_traj[0]), np.array(new_traj[1])) ]
+    time = np.flatnonzero(is_valid_array) + t0
+    return [ (time, coordinates[is_valid_array]) ]
 
 
 def fill_hole_1d(binary, size):
@@ -705,18 +780,22 @@ def fill_hole_1d(binary, size):
         >>> np.array_equal(filled, fill_hole_1d(binary, 2))
         True
     """
-    filled = binary.copy().astype(int)
-    for s in np.arange(size + 2, 2, -1):
-        probe = np.zeros(s)
-        probe[0] = 1
-        probe[-1] = 1
-        for shift in range(0, len(binary) - s + 1):
-            if np.array_equal(probe, filled[shift : shift + s]):
-                filled[shift : shift + s] = 1
+    filled = binary.astype(bool)
+    change = np.diff(filled.astype(np.int8))
+    starts = np.flatnonzero(change == -1) + 1  # first 0 after a 1
+    ends = np.flatnonzero(change == 1) + 1  # first 1 after a 0
+    if len(filled) > 0 and not filled[0]:
+        ends = ends[1:]  # the leading zeros are not a hole
+    starts = starts[:len(ends)]  # neither are the trailing zeros
+    is_hole = (ends - starts) <= size
+    delta = np.zeros(len(filled) + 1, dtype=int)
+    delta[starts[is_hole]] = 1
+    delta[ends[is_hole]] = -1
+    filled |= np.cumsum(delta[:-1]) > 0
     return filled.astype(binary.dtype)
 
 
-def interpolate_nan(coordinates):
+def interpolate_nan(coordinates, is_nan=None):
     """
     replace nan with linear interpolation of a (n, 3) array along the first axis
 
@@ -724,7 +803,8 @@ def interpolate_nan(coordinates):
         coordinates (`numpy.ndarray`): xyz coordinates of a trajectory,\
             might contain nan
         is_nan (`numpy.ndarray`): 1d bolean array showing if coordinates[i]\
-            is nan or not
+            is nan or not. It will be calculated from the x-coordinates\
+            if not given.
 
     Return:
         `numpy.ndarray`: the interpolated coordinates array
@@ -741,23 +821,18 @@ def interpolate_nan(coordinates):
         >>> np.allclose(target, interpolate_nan(with_nan))
         True
     """
-    is_nan = np.isnan(coordinates[:, 0])
-    for head_idx in range(len(coordinates)):
-        if not is_nan[head_idx]:
-            break
-    # detect tail NAN
-    for tail_idx in range(len(coordinates))[::-1]:
-        if not is_nan[tail_idx]:
-            break
-    valid_range = slice(head_idx, tail_idx + 1, 1)
+    if is_nan is None:
+        is_nan = np.isnan(coordinates[:, 0])
     result = coordinates.copy()
-    nan_indices = is_nan[valid_range].nonzero()[0]
-    not_nan_indices = np.logical_not(is_nan[valid_range]).nonzero()[0]
-    for dim in range(3):
-        result[:, dim][valid_range][nan_indices] = np.interp(
-            nan_indices,
-            not_nan_indices,
-            coordinates[:, dim][valid_range][not_nan_indices]
+    not_nan_indices = np.flatnonzero(~is_nan)
+    if len(not_nan_indices) == 0:
+        return result
+    # the head & tail NAN were not interpolated
+    head_idx, tail_idx = not_nan_indices[0], not_nan_indices[-1]
+    nan_indices = np.flatnonzero(is_nan[head_idx:tail_idx + 1]) + head_idx
+    for dim in range(coordinates.shape[1]):
+        result[nan_indices, dim] = np.interp(
+            nan_indices, not_nan_indices, coordinates[not_nan_indices, dim]
         )
     return result
 
@@ -777,17 +852,20 @@ def get_valid_ctraj(trajectories, z_min, z_max):
     Return:
         `list` [ ( `numpy.ndarray`, `float` ) ]: valid trajectories
     """
-    valid_trajectories = []
-    is_valid = True
-    for t in trajectories:
-        z = t[0].T[-1]
-        z = z[~np.isnan(z)]
-        is_valid *= (z < z_max).all()  # all fish under water
-        is_valid *= (z > z_min).all()  # all fish in the tank
-        is_valid *= len(z) > 1
-        if is_valid:
-            valid_trajectories.append(t)
-    return valid_trajectories
+    if len(trajectories) == 0:
+        return []
+    z_list = [t[0][:, -1] for t in trajectories]
+    z = np.concatenate(z_list)
+    traj_indices = np.repeat(
+        np.arange(len(z_list)), [len(z_traj) for z_traj in z_list]
+    )
+    is_measured = ~np.isnan(z)
+    z, traj_indices = z[is_measured], traj_indices[is_measured]
+    is_outside = (z >= z_max) | (z <= z_min)  # above water or below the tank
+    n_outside = np.bincount(traj_indices[is_outside], minlength=len(z_list))
+    n_measured = np.bincount(traj_indices, minlength=len(z_list))
+    is_valid = (n_outside == 0) & (n_measured > 1)
+    return [trajectories[i] for i in np.flatnonzero(is_valid)]
 
 
 def post_process_ctraj(trajs_3d, t0, z_min, z_max, num=5, rtol=10):
@@ -821,22 +899,20 @@ def post_process_ctraj(trajs_3d, t0, z_min, z_max, num=5, rtol=10):
         return []
 
     # join overlapped trajectories
-    op = get_overlap_pairs(trajs_3d_filtered, num, rtol)
-    jop = join_pairs(op)
-    if len(jop) == 0:
-        trajs_3d_opt = []
-        for traj in trajs_3d_filtered:
-            trajs_3d_opt += convert_traj_format(traj, t0)
-        return trajs_3d_opt
-    trajs_3d_opt = []
+    groups = get_overlap_groups(trajs_3d_filtered, num, rtol)
+    is_unique = np.ones(len(trajs_3d_filtered), dtype=bool)
+    for p in groups:
+        is_unique[p] = False
 
-    not_unique = np.hstack(jop).ravel().tolist()
-    for i, traj in enumerate(trajs_3d_filtered):
-        if i not in not_unique:
-            trajs_3d_opt += convert_traj_format(traj, t0)
-    for p in jop:
-        best_idx = np.argmin([trajs_3d_filtered[idx][1] for idx in p])
-        chosen_traj = trajs_3d_filtered[p[best_idx]]
+    trajs_3d_opt = []
+    for i in np.flatnonzero(is_unique):
+        trajs_3d_opt += convert_traj_format(trajs_3d_filtered[i], t0)
+    errors = np.fromiter(
+        (t[1] for t in trajs_3d_filtered), dtype=np.float64,
+        count=len(trajs_3d_filtered)
+    )
+    for p in groups:
+        chosen_traj = trajs_3d_filtered[p[np.argmin(errors[p])]]
         trajs_3d_opt += convert_traj_format(chosen_traj, t0)
     return trajs_3d_opt
 
@@ -878,20 +954,18 @@ def get_short_trajs(
     t_starts = [t * shift for t in range(frame_num // shift)]
     proj_mats = [cam.p for cam in cameras]
     cam_origins = [cam.o for cam in cameras]
+    cam_args = (*proj_mats, *cam_origins)
     trajectories = []
     for t0 in t_starts:
-        stereo_matches = []
-        for features_mv in features_mv_mt[t0 : t0 + shift]:
-            matched = match_v3(
-                *features_mv, *proj_mats, *cam_origins,
-                tol_2d=st_error_tol, optimise=True
-            )
-            stereo_matches.append(matched)
-        features_mt_mv = []  # shape (3, frames, n, 3)
-        for view in range(3):
-            features_mt_mv.append([])
-            for frame in range(t0, t0 + shift):
-                features_mt_mv[-1].append( features_mv_mt[frame][view] )
+        stereo_matches = [
+            match_v3(
+                *features_mv, *cam_args, tol_2d=st_error_tol, optimise=True
+            ) for features_mv in features_mv_mt[t0 : t0 + shift]
+        ]
+        features_mt_mv = [  # shape (3, frames, n, 3)
+            [features_mv[view] for features_mv in features_mv_mt[t0 : t0 + shift]]
+            for view in range(3)
+        ]
         if (t2 == 1 and t3 == 1):
             ctrajs_3d = get_trajs_3d(
                 features_mt_mv, stereo_matches, proj_mats, cam_origins,
@@ -938,36 +1012,74 @@ def remove_spatial_overlap(trajectories, ntol, rtol):
         `list` of (`numpy.ndarray`, `float`): trajectories without\
             spatial overlap
     """
-    trajs_filtered = []
-    for t in trajectories:
-        not_nan = np.logical_not(np.isnan(t[0].T[0]))
-        if np.sum(not_nan) > 1:
-            trajs_filtered.append(t)
+    trajs_filtered = [
+        t for t in trajectories if np.count_nonzero(~np.isnan(t[0][:, 0])) > 1
+    ]
     if len(trajs_filtered) == 0:
         return []
     # join overlapped trajectories
-    op = get_overlap_pairs(trajs_filtered, ntol, rtol)
-    jop = join_pairs(op)
-    if len(jop) == 0:
+    groups = get_overlap_groups(trajs_filtered, ntol, rtol)
+    if len(groups) == 0:
         return trajs_filtered
     else:
-        trajs_opt = []
-        not_unique = np.hstack(jop).ravel()
-        unique = np.setdiff1d(
-            np.arange(len(trajs_filtered)), not_unique
+        is_unique = np.ones(len(trajs_filtered), dtype=bool)
+        for p in groups:
+            is_unique[p] = False
+        trajs_opt = [trajs_filtered[i] for i in np.flatnonzero(is_unique)]
+
+        errors = np.fromiter(
+            (t[1] for t in trajs_filtered), dtype=np.float64,
+            count=len(trajs_filtered)
         )
-        for i in unique:
-            trajs_opt.append(trajs_filtered[i])
-
-        for p in jop:
-            best_idx = np.argmin([trajs_filtered[idx][1] for idx in p])
-            chosen_traj = trajs_filtered[p[best_idx]]
-            trajs_opt.append(chosen_traj)
+        for p in groups:
+            trajs_opt.append(trajs_filtered[p[np.argmin(errors[p])]])
         return trajs_opt
 
 
+def __get_overlapped_positions(batch, window, lag):
+    """
+    Get the positions of all trajectories in a batch inside a time window
+
+    Args:
+        batch (`list` or `numpy.ndarray`): trajectories represented as\
+            (positions, error), or the positions of all trajectories,\
+            shape (n_traj, size, 3)
+        window (`slice`): the frames to take from each trajectory
+        lag (`int`): the number of frames inside the window
+
+    Return:
+        `numpy.ndarray`: the positions, shape (n_traj, lag, 3)
+    """
+    if isinstance(batch, np.ndarray):
+        return batch[:, window].reshape(-1, lag, 3)
+    return np.array([t[0][window] for t in batch]).reshape(-1, lag, 3)
+
+
+@njit(parallel=True)
+def __get_temporal_dist_mat(tails, heads, out):
+    """
+    Calculate the squared distances between the tails and the heads of\
+        trajectories at each overlapped frame
+
+    Args:
+        tails (`numpy.ndarray`): the last lag positions, shape (N1, lag, 3)
+        heads (`numpy.ndarray`): the first lag positions, shape (N2, lag, 3)
+        out (`numpy.ndarray`): the squared distances, shape (N1, N2, lag)
+    """
+    n1, lag, dim = tails.shape
+    n2 = heads.shape[0]
+    for i in prange(n1):
+        for j in range(n2):
+            for k in range(lag):
+                dist_sq = 0.0
+                for d in range(dim):
+                    diff = tails[i, k, d] - heads[j, k, d]
+                    dist_sq += diff * diff
+                out[i, j, k] = dist_sq
+
+
 def get_temporal_overlapped_pairs(
-        batch_1, batch_2, lag, ntol, rtol, unique='conn'
+        batch_1, batch_2, lag, ntol, rtol, unique='conn', buf=None
 ):
     """
     Get pairs that link overlapped trajectories from two batches.
@@ -976,29 +1088,41 @@ def get_temporal_overlapped_pairs(
     Args:
         batch_1
             (`list` [ ( `numpy.ndarray`, `float` ) ]):\
-            each trajectory is (positions, error), time is `[t0, t0 + size]`
+            each trajectory is (positions, error), time is `[t0, t0 + size]`.\
+            It can also be the positions of all trajectories, shape\
+            (n_traj, size, 3)
         batch_2
             (`list` [ ( `numpy.ndarray`, `float` ) ]):\
             each trajectory is (positions, error), time is\
-            `[t0 + lag, t0 + size + lag]`
+            `[t0 + lag, t0 + size + lag]`. It can also be the positions\
+            of all trajectories, shape (n_traj, size, 3)
         lag (`int`): The temporal lag between two batches
         ntol (`int`): if two trajectories have more numbers of\
             overlapped positions than `ntol`, establish a link
         rtol (`float`): positions whose distance is smaller than `rtol`\
             are considered to be overlapped.
+        buf (`numpy.ndarray`): (optional) a float64 array reused to store\
+            the distances, a new array is allocated if its shape is\
+            smaller than (N1, N2, lag)
 
     Return:
         `numpy.ndarray`: indices of a pair of overlapped trajectories,\
             shape (n, 2)
     """
     rtol_sq = rtol ** 2
-    dist_mat = np.empty((len(batch_1), len(batch_2), lag))  # (N1, N2, lag)
-    for i, t1 in enumerate(batch_1):
-        for j, t2 in enumerate(batch_2):
-            dist_sq = np.sum(
-                np.power(t1[0][-lag:] - t2[0][:lag], 2), axis=1
-            )  # (lag,)
-            dist_mat[i, j, :] = dist_sq
+    tails = __get_overlapped_positions(batch_1, slice(-lag, None), lag)
+    heads = __get_overlapped_positions(batch_2, slice(None, lag), lag)
+    shape = (len(tails), len(heads), lag)  # (N1, N2, lag)
+    if buf is not None and buf.shape[0] >= shape[0] and \
+            buf.shape[1] >= shape[1] and buf.shape[2] >= shape[2]:
+        dist_mat = buf[:shape[0], :shape[1], :shape[2]]
+    else:
+        dist_mat = np.empty(shape)
+    __get_temporal_dist_mat(
+        np.ascontiguousarray(tails, dtype=np.float64),
+        np.ascontiguousarray(heads, dtype=np.float64),
+        dist_mat
+    )
     with np.errstate(invalid='ignore'):  # ignore the case like NAN < 5
         conn_mat = np.sum(dist_mat < rtol_sq, axis=2)
         adj_mat = conn_mat >= ntol  # (N1, N2)
@@ -1011,16 +1135,28 @@ def get_temporal_overlapped_pairs(
             mask_2 = np.isclose(
                 min_dist_mat, np.nanmin(min_dist_mat, axis=1)[:, np.newaxis]
             )
-        elif unique == 'conn':
-            mask_1 = np.isclose(
-                conn_mat, np.nanmax(conn_mat, axis=0)[np.newaxis, :]
-            )
-            mask_2 = np.isclose(
-                conn_mat, np.nanmax(conn_mat, axis=1)[:, np.newaxis]
-            )
+        elif unique == 'conn':  # conn_mat is integer, exact match is fine
+            mask_1 = conn_mat == conn_mat.max(axis=0, keepdims=True)
+            mask_2 = conn_mat == conn_mat.max(axis=1, keepdims=True)
         adj_mat *= np.logical_and(mask_1, mask_2)
-    pairs = np.nonzero(adj_mat)
-    return np.array(pairs).T  # (N, 2)
+    return np.column_stack(np.nonzero(adj_mat))  # (N, 2), (0, 2) if empty
+
+
+def __get_unpaired_indices(n, paired):
+    """
+    Get the indices in range(n) that are not in the paired indices,\
+        which is np.setdiff1d(np.arange(n), paired) without sorting
+
+    Args:
+        n (`int`): the total number of items
+        paired (`numpy.ndarray`): the indices of paired items
+
+    Return:
+        `numpy.ndarray`: the sorted indices of unpaired items
+    """
+    is_paired = np.zeros(n, dtype=bool)
+    is_paired[paired] = True
+    return np.flatnonzero(~is_paired)
 
 
 def resolve_temporal_overlap(trajectory_batches, lag, ntol, rtol):
@@ -1058,13 +1194,26 @@ def resolve_temporal_overlap(trajectory_batches, lag, ntol, rtol):
     t0_extended, t0_fragments = [], []
     previous_pairs = np.empty((0, 2), dtype=int)
 
+    # trajectories in a batch share the same length
+    positions = [  # shape (n_traj, size, 3) for each batch
+        np.array([t[0] for t in batch]) if len(batch) > 0
+        else np.empty((0, lag, 3)) for batch in trajectory_batches
+    ]
+    extended_tails = np.empty((0, lag, 3))
+    n_max = max(len(batch) for batch in trajectory_batches)
+    dist_buf = np.empty((n_max, n_max, lag))  # reused by all batches
+
     for i, b1 in enumerate(trajectory_batches[1:]):
 
         new_extended = []
         new_t0_extended = []
 
         b0 = trajectory_batches[i]   # the previous batch, shape (n_traj, ...)
-        pairs_extend = get_temporal_overlapped_pairs(extended, b1, lag, ntol, rtol)
+        if len(extended_tails) > dist_buf.shape[0]:  # tied pairs, see unique
+            dist_buf = np.empty((len(extended_tails), n_max, lag))
+        pairs_extend = get_temporal_overlapped_pairs(
+            extended_tails, positions[i + 1], lag, ntol, rtol, buf=dist_buf
+        )
 
         ne_pe_indices = []
         if len(extended) > 0:
@@ -1080,41 +1229,48 @@ def resolve_temporal_overlap(trajectory_batches, lag, ntol, rtol):
             new_t0_extended += [t0_extended[pe] for pe, p1 in pairs_extend]
 
             # add non-extended previously extended trajectories into fragments
-            ne_pe_indices = np.setdiff1d(
-                np.arange(len(extended)), pairs_extend.T[0]
+            ne_pe_indices = __get_unpaired_indices(
+                len(extended), pairs_extend[:, 0]
             )
             fragments    += [extended[idx]    for idx in ne_pe_indices]
             t0_fragments += [t0_extended[idx] for idx in ne_pe_indices]
 
-        pne_indices = np.setdiff1d(  # pne -- previously not extended
-            np.arange(len(b0)), previous_pairs.T[1]
+        pne_indices = __get_unpaired_indices(  # pne -- previously not extended
+            len(b0), previous_pairs[:, 1]
         )
         pne_trajs = [b0[ni] for ni in pne_indices]
 
         # trajectories in current batch, but not matched to
         # extended trajectories 
-        indice_not_extended = np.setdiff1d(
-            np.arange(len(b1)), pairs_extend.T[1]
+        indice_not_extended = __get_unpaired_indices(
+            len(b1), pairs_extend[:, 1]
         )
-        b1_not_extended = [b1[idx] for idx in indice_not_extended]
 
         pairs_new = get_temporal_overlapped_pairs(
-            pne_trajs, b1_not_extended, lag, ntol, rtol
+            positions[i][pne_indices],
+            positions[i + 1][indice_not_extended],
+            lag, ntol, rtol, buf=dist_buf
         )
         remap = np.arange(len(b1))[indice_not_extended]
         pairs_new[:, 1] = remap[pairs_new[:, 1]]  # remap to the indices of b1
 
-        # extended previously not extended trajectories
-        new_extended += [
-            (
-                np.concatenate((pne_trajs[pn][0][:-lag], b1[p1][0]), axis=0),
-                pne_trajs[pn][1] + b1[p1][1]  # reprojection error
-            ) for pn, p1 in pairs_new
+        # extended previously not extended trajectories, they share the
+        # same length so their positions are filled into one array
+        size_0 = positions[i].shape[1] - lag
+        size_1 = positions[i + 1].shape[1]
+        positions_new = np.empty((len(pairs_new), size_0 + size_1, 3))
+        positions_new[:, :size_0] = positions[i][
+            pne_indices[pairs_new[:, 0]], :size_0
         ]
+        positions_new[:, size_0:] = positions[i + 1][pairs_new[:, 1]]
+        errors_new = np.array(  # reprojection error
+            [pne_trajs[pn][1] + b1[p1][1] for pn, p1 in pairs_new]
+        )
+        new_extended += list(zip(positions_new, errors_new))
         new_t0_extended += [i * lag  for _ in pairs_new]
 
         # add non-extended previously non-extended trajectories into fragments
-        ne_ne_indices = np.setdiff1d(np.arange(len(pne_trajs)), pairs_new.T[0])
+        ne_ne_indices = __get_unpaired_indices(len(pne_trajs), pairs_new[:, 0])
         fragments    += [pne_trajs[idx] for idx in ne_ne_indices]
         t0_fragments += [i * lag        for _   in ne_ne_indices]
 
@@ -1123,12 +1279,12 @@ def resolve_temporal_overlap(trajectory_batches, lag, ntol, rtol):
         )
         t0_extended = new_t0_extended
         extended = new_extended
+        extended_tails = positions[i + 1][previous_pairs[:, 1], -lag:]
 
-    # For the last batch
-    b0 = trajectory_batches[-2]   # the previous batch, shape (n_traj, ...)
-    pne_indices = np.setdiff1d(  # pne -- previously not extended
-        np.arange(len(b0)),
-        previous_pairs.T[1]
+    # For the last batch, previous_pairs[:, 1] are indices of its trajectories
+    b0 = trajectory_batches[-1]   # the last batch, shape (n_traj, ...)
+    pne_indices = __get_unpaired_indices(  # pne -- previously not extended
+        len(b0), previous_pairs[:, 1]
     )
     pne_trajs = [b0[ni] for ni in pne_indices]
     fragments += pne_trajs
@@ -1139,7 +1295,8 @@ def resolve_temporal_overlap(trajectory_batches, lag, ntol, rtol):
 
 def get_trajectory_batches(
         cameras, features_mv_mt, st_error_tol, search_range, tau,
-        z_min, z_max, overlap_num, overlap_rtol, reproj_err_tol, t1=1
+        z_min, z_max, overlap_num, overlap_rtol, reproj_err_tol, t1=1,
+        cores=1
     ):
     """
     Getting short 3D trajectories batches from 2D positions and camera informations
@@ -1168,6 +1325,9 @@ def get_trajectory_batches(
         reproj_err_tol (:obj:`float`): the 3d positiosn whose reprojection error
             is greater than this will not be re-constructed, instead a NAN
             is inserted into the trajectory
+        t1 (:obj:`int`): the time duration in the first iteration in GReTA
+        cores (:obj:`int`): the number of processes to build the batches\
+            in parallel
 
     Return:
         :obj:`list` [ :obj:`list` [ (:obj:`numpy.ndarray`, :obj:`float`) ] ]:
@@ -1179,42 +1339,65 @@ def get_trajectory_batches(
     t_starts = [t for t in t_starts if t + tau <= frame_num]
     proj_mats = [cam.p for cam in cameras]
     cam_origins = [cam.o for cam in cameras]
-    batches = []
-    for i, t0 in enumerate(t_starts):
-        print(f"processing batch {i}")
-        stereo_matches = []
-        for features_mv in features_mv_mt[t0 : t0 + tau]:
-            matched = match_v3(
-                *features_mv, *proj_mats, *cam_origins,
-                tol_2d=st_error_tol, optimise=True
-            )
-            stereo_matches.append(matched)
-        features_mt_mv = []  # shape (3, frames, n, 3)
-        for view in range(3):
-            features_mt_mv.append([])
-            for frame in range(t0, t0 + tau):
-                features_mt_mv[-1].append( features_mv_mt[frame][view] )
-        if t1 == 1:
-            ctrajs_3d = get_trajs_3d(
-                features_mt_mv, stereo_matches, proj_mats, cam_origins,
-                c_max=500,
-                search_range=search_range, re_max=reproj_err_tol
-            )
-        else:
-            ctrajs_3d = get_trajs_3d_t1t2(
-                features_mt_mv, stereo_matches, proj_mats, cam_origins,
-                c_max=500,
-                search_range=search_range,
-                search_range_traj=search_range,
-                tau_1=t1, tau_2=tau//t1,
-                re_max=reproj_err_tol
-            )
-        ctrajs_3d = get_valid_ctraj(ctrajs_3d, z_min, z_max)
-        ctrajs_3d = remove_spatial_overlap(ctrajs_3d, overlap_num, overlap_rtol)
-        batches.append(ctrajs_3d)
+    kwargs = dict(
+        st_error_tol=st_error_tol, search_range=search_range,
+        z_min=z_min, z_max=z_max, overlap_num=overlap_num,
+        overlap_rtol=overlap_rtol, reproj_err_tol=reproj_err_tol, t1=t1
+    )
+    if cores == 1:
+        batches = []
+        for i, t0 in enumerate(t_starts):
+            print(f"processing batch {i}")
+            batches.append(__get_trajectory_batch(
+                features_mv_mt[t0 : t0 + tau], proj_mats, cam_origins, **kwargs
+            ))
+    else:
+        batches = Parallel(n_jobs=cores)(
+            delayed(__get_trajectory_batch)(
+                features_mv_mt[t0 : t0 + tau], proj_mats, cam_origins, **kwargs
+            ) for t0 in t_starts
+        )
     return batches
 
 
+def __get_trajectory_batch(
+        features_mv_mt, proj_mats, cam_origins, st_error_tol, search_range,
+        z_min, z_max, overlap_num, overlap_rtol, reproj_err_tol, t1
+    ):
+    """
+    Getting the trajectories in one batch for :any:`get_trajectory_batches`,\
+        the batch contains all the frames in `features_mv_mt`
+    """
+    tau = len(features_mv_mt)
+    cam_args = (*proj_mats, *cam_origins)
+    stereo_matches = [
+        match_v3(
+            *features_mv, *cam_args, tol_2d=st_error_tol, optimise=True
+        ) for features_mv in features_mv_mt
+    ]
+    features_mt_mv = [  # shape (3, frames, n, 3)
+        [features_mv[view] for features_mv in features_mv_mt]
+        for view in range(3)
+    ]
+    if t1 == 1:
+        ctrajs_3d = get_trajs_3d(
+            features_mt_mv, stereo_matches, proj_mats, cam_origins,
+            c_max=500,
+            search_range=search_range, re_max=reproj_err_tol
+        )
+    else:
+        ctrajs_3d = get_trajs_3d_t1t2(
+            features_mt_mv, stereo_matches, proj_mats, cam_origins,
+            c_max=500,
+            search_range=search_range,
+            search_range_traj=search_range,
+            tau_1=t1, tau_2=tau//t1,
+            re_max=reproj_err_tol
+        )
+    ctrajs_3d = get_valid_ctraj(ctrajs_3d, z_min, z_max)
+    return remove_spatial_overlap(ctrajs_3d, overlap_num, overlap_rtol)
+
+
 def get_brcs(number=1, bias=(1.0, 0.7, 0.8), brightness=(0.25, 1.0)):
     """
     Get biased random colours
@@ -1255,17 +1438,18 @@ def draw_fish(positions, ax, size=1):
         (5, -2.2), (1, -2.5), (0, 0)
     ]) / 10 * size
     codes = [1, 4, 4, 4, 2, 2, 2, 2, 4, 4, 4]
-    for p in positions:
-        shift = np.array([p[d] for d in range(3) if d != 1])[np.newaxis, :]
-        v = fish_vertices + shift
+    positions = np.reshape(positions, (-1, 3))
+    shifts = positions[:, [0, 2]]  # fish are drawn in the x-z plane
+    colors = np.reshape(get_brcs(len(positions)), (-1, 3))
+    for shift, y, color in zip(shifts, positions[:, 1], colors):
         fish = PathPatch(
-            Path(v, codes=codes),
-            facecolor=get_brcs(1),
+            Path(fish_vertices + shift, codes=codes),
+            facecolor=color,
             edgecolor='k'
         )
         ax.add_patch(fish)
         art3d.pathpatch_2d_to_3d(
-            fish, z=p[1], zdir="y",
+            fish, z=y, zdir="y",
         )
 
 
@@ -1288,23 +1472,22 @@ def plot_cameras(ax, cameras, water_level=0, depth=400):
     camera_size = 100
     focal_len = 2
     ray_length = 500
-    camera_segments = [
-            np.array(([0, 0, 0], [1, -1, focal_len])) * camera_size,
-            np.array(([0, 0, 0], [-1, 1, focal_len])) * camera_size,
-            np.array(([0, 0, 0], [-1, -1, focal_len])) * camera_size,
-            np.array(([0, 0, 0], [1, 1, focal_len])) * camera_size,
-            np.array(([1, 1, focal_len], [1, -1, focal_len])) * camera_size,
-            np.array(([1, -1, focal_len], [-1, -1, focal_len])) * camera_size,
-            np.array(([-1, -1, focal_len], [-1, 1, focal_len])) * camera_size,
-            np.array(([-1, 1, focal_len], [1, 1, focal_len])) * camera_size
-            ]
+    camera_segments = np.array([  # shape (8 segments, 3 points, 3 dim)
+            ([0, 0, 0], [1, -1, focal_len], [np.nan] * 3),
+            ([0, 0, 0], [-1, 1, focal_len], [np.nan] * 3),
+            ([0, 0, 0], [-1, -1, focal_len], [np.nan] * 3),
+            ([0, 0, 0], [1, 1, focal_len], [np.nan] * 3),
+            ([1, 1, focal_len], [1, -1, focal_len], [np.nan] * 3),
+            ([1, -1, focal_len], [-1, -1, focal_len], [np.nan] * 3),
+            ([-1, -1, focal_len], [-1, 1, focal_len], [np.nan] * 3),
+            ([-1, 1, focal_len], [1, 1, focal_len], [np.nan] * 3),
+            ]) * camera_size  # the nan breaks the segments in one line
     for cam in cameras:
         origin = -cam.r.T @ cam.t
         orient = cam.r.T @ np.array([0, 0, 1])
         origins.append(origin)
-        for seg in camera_segments:
-            to_plot = np.array([cam.r.T @ p + origin for p in seg])
-            ax.plot(*to_plot.T, color='deeppink')
+        to_plot = camera_segments.reshape(-1, 3) @ cam.r + origin  # r.T @ p
+        ax.plot(*to_plot.T, color='deeppink')
         ax.quiver(*origin, *orient * ray_length, color='deeppink')
     for o in origins:
         ax.scatter(*o, color='w', edgecolor='deeppink', zorder=6)
@@ -1343,17 +1526,17 @@ def solve_overlap_lp(points, errors, diameter):
     dist_mat = squareform(dists)  # (N, N)
     if N <= 1:
         return points
+    overlapped = np.nonzero(np.triu(dist_mat < diameter, k=1))
     for n_target in range(N, 1, -1):
         model = Model(name="Overlap Model")
         x_vars = [model.binary_var(name=f"x_{i}") for i in range(N)]
         # total number == n_target
         model.add_constraint(model.sum(x_vars) == n_target)
-        # no overlap
-        for i, j in product(np.arange(N), repeat=2):
-            if i != j:
-                model.add_constraint(
-                    (dist_mat[i, j] - diameter) * x_vars[i] * x_vars[j] >= 0
-                )
+        # no overlap, only the overlapped pairs can violate the constraint
+        for i, j in zip(*overlapped):
+            model.add_constraint(
+                (dist_mat[i, j] - diameter) * x_vars[i] * x_vars[j] >= 0
+            )
         objective = model.sum(x * e for x, e in zip(x_vars, errors))
         model.minimize(objective)
         is_successful = model.solve()
@@ -1418,6 +1601,62 @@ def __solve_overlap_lp_phys(points, errors, diameter, beta, mu):
         return points[np.argmin(errors)][np.newaxis, :]
 
 
+def __get_overlap_cliques(points, diameter):
+    """
+    Label the groups of particles that overlap with each other, directly\
+        or through other particles
+
+    Args:
+        points (np.ndaray): particle locations, shape (N, dimension)
+        diameter (float): the minimium distance between non-overlap particles
+
+    Return:
+        tuple: the number of groups, and the group label of each particle
+    """
+    N = len(points)
+    pairs = cKDTree(points).query_pairs(r=diameter, output_type='ndarray')
+    dists = np.linalg.norm(points[pairs[:, 0]] - points[pairs[:, 1]], axis=1)
+    pairs = pairs[dists < diameter]  # query_pairs also includes the boundary
+    adjacency = coo_matrix(
+        (np.ones(len(pairs), dtype=bool), (pairs[:, 0], pairs[:, 1])),
+        shape=(N, N)
+    )
+    return connected_components(adjacency, directed=False)
+
+
+def __solve_overlap_pair_phys(points, errors, diameter, beta, mu):
+    """
+    Solve the model in :any:`__solve_overlap_lp_phys` for two overlapped\
+        particles, by comparing the objective of all possible choices
+
+    Args:
+        points (np.ndaray): particle locations, shape (2, dimension)
+        errors (np.ndarray): the error (cost) of each particle, shape (2, )
+        diameter (float): the minimium distance between non-overlap particles
+        beta (float): the inverse temperature
+        mu (float): the chemical potential
+
+    Return:
+        np.ndarray: the optimised positions, shape (N', dimension)
+    """
+    errors = errors - mu
+    best = np.argmin(errors)
+    # both slack variables are needed to keep the two particles
+    slack = diameter - np.linalg.norm(points[0] - points[1])
+    objectives = (
+        errors.sum() + 2 * slack * beta,  # keep both
+        errors[best],  # keep the better one
+        0,  # keep none
+    )
+    choice = np.argmin(objectives)
+    if choice == 0:
+        return points
+    elif choice == 1:
+        return points[best][np.newaxis, :]
+    else:
+        return points[:0]
+
+
 def solve_overlap_lp_fast(points, errors, diameter):
     """
     Remove overlapped particles using linear programming, following
@@ -1435,15 +1674,14 @@ def solve_overlap_lp_fast(points, errors, diameter):
         np.ndarray: the optimised positions, shape (N', dimension)
     """
     N, dim = points.shape
-    dists = pdist(points)
-    aij = squareform(dists) < diameter
-    np.fill_diagonal(aij, 0)
-    n_cliques, labels = connected_components(aij, directed=False)
+    n_cliques, labels = __get_overlap_cliques(points, diameter)
     result = []
     for val in range(n_cliques):
         clique = np.nonzero(labels == val)[0]
         if len(clique) == 1:
             result.append(points[clique])
+        elif len(clique) == 2:  # two overlapped points, keep the better one
+            result.append(points[clique[np.argmin(errors[clique])]][np.newaxis])
         else:
             result.append(
                 solve_overlap_lp(
@@ -1470,15 +1708,16 @@ def solve_overlap_lp_phys(points, errors, diameter, beta, mu):
         np.ndarray: the optimised positions, shape (N', dimension)
     """
     N, dim = points.shape
-    dists = pdist(points)
-    aij = squareform(dists) < diameter
-    np.fill_diagonal(aij, 0)
-    n_cliques, labels = connected_components(aij, directed=False)
+    n_cliques, labels = __get_overlap_cliques(points, diameter)
     result = []
     for val in range(n_cliques):
         clique = np.nonzero(labels == val)[0]
         if len(clique) == 1:
             result.append(points[clique])
+        elif len(clique) == 2:
+            result.append(__solve_overlap_pair_phys(
+                points[clique], errors[clique], diameter, beta, mu
+            ))
         else:
             result.append(
                 __solve_overlap_lp_phys(
@@ -1489,7 +1728,9 @@ def solve_overlap_lp_phys(points, errors, diameter, beta, mu):
     return np.concatenate(result, axis=0)
 
 
-def refine_trajectory(trajectory, cameras, features, tol_2d):
+def refine_trajectory(
+        trajectory, cameras, features, tol_2d, features_undist=None
+):
     """
     Refine the trajectory so that each reprojected position
         matches the features detected in different cameras.
@@ -1506,6 +1747,10 @@ def refine_trajectory(trajectory, cameras, features, tol_2d):
         tol_2d (float): the tolerance for 2D reprojection errors.
             The very problematic 3D points will be replaced by the
             origional points in the `trajectory`.
+        features_undist (list): (optional) the undistorted `features`,
+            in the same layout. If given, the matched features will not be
+            undistorted again, which is useful when the same features are
+            used to refine many trajectories.
 
     Return:
         numpy.ndarray: a optimised trajectory, where 3D locations
@@ -1520,22 +1765,38 @@ def refine_trajectory(trajectory, cameras, features, tol_2d):
     traj_2d_nview = np.empty((n_view, n_frame, 2))
 
     mask = np.ones(n_frame).astype(bool)
-
-
-    for f in range(n_frame):
-        for v in range(n_view):
-            reproj = traj_reproj[v][f]
-            distances = np.linalg.norm(features[v][f] - reproj, axis=1)
-            nearest = np.argmin(distances)
-            if distances[nearest] > tol_2d:
-                mask[f] = False
-            traj_2d_nview[v][f] = features[v][f][nearest]
-
-    undist = np.array([
-        cameras[v].undistort_points(
-            traj_2d[mask], want_uv=True
-        ) for v, traj_2d in enumerate(traj_2d_nview)
-    ])
+    nearest_nview = np.zeros((n_view, n_frame), dtype=int)
+
+    # find the nearest feature of each frame in each view, all at once
+    for v in range(n_view):
+        n_features = np.array([len(fv) for fv in features[v]], dtype=int)
+        candidates = np.concatenate([
+            np.reshape(fv, (-1, 2)) for fv in features[v]
+        ])  # features from all frames, shape (n_candidate, 2)
+        frames = np.repeat(np.arange(n_frame), n_features)
+        distances = np.linalg.norm(candidates - traj_reproj[v][frames], axis=1)
+        order = np.lexsort((distances, frames))  # sort by frame, then distance
+        has_feature = n_features > 0
+        starts = np.cumsum(n_features) - n_features
+        nearest = order[starts[has_feature]]  # the nearest one in each frame
+        mask[~has_feature] = False
+        mask[np.flatnonzero(has_feature)[distances[nearest] > tol_2d]] = False
+        traj_2d_nview[v][~has_feature] = np.nan
+        traj_2d_nview[v][has_feature] = candidates[nearest]
+        nearest_nview[v][has_feature] = nearest
+
+    if features_undist is None:
+        undist = np.array([
+            cameras[v].undistort_points(
+                traj_2d[mask], want_uv=True
+            ) for v, traj_2d in enumerate(traj_2d_nview)
+        ])
+    else:
+        undist = np.array([
+            np.concatenate([
+                np.reshape(fv, (-1, 2)) for fv in features_undist[v]
+            ])[nearest_nview[v][mask]] for v in range(n_view)
+        ])
 
     refined = refractive_triangulate(
         *undist,
@@ -1549,7 +1810,7 @@ def refine_trajectory(trajectory, cameras, features, tol_2d):
     return new_traj
 
 
-def optimise_c2c(R, T, K, C, p2d, p3dh, method='Nelder-Mead'):
+def optimise_c2c(R, T, K, C, p2d, p3dh, method='lm'):
     """
     Optimise the camera extrinsic parameters by measuring the ellipse (conic)\
     projected by a circle at plane :math:`\\pi_z = (0, 0, 1, 0)^T`.
@@ -1565,22 +1826,30 @@ def optimise_c2c(R, T, K, C, p2d, p3dh, method='Nelder-Mead'):
             shape (n, 2)
         p3dh (numpy.ndarray): the homogeneous representations of 3d points\
             for the PnP problem, shape (n, 3)
+        method (str): the name of the optimisation method. The residuals are\
+            minimised with `scipy.optimize.least_squares` for 'lm', 'trf'\
+            and 'dogbox', otherwise the cost is minimised with\
+            `scipy.optimize.minimize`.
 
     Return:
         tuple: the optimised :math:`\\mathbf{R} \\in so(3)` and\
         :math:`\\mathbf{T} \\in \\mathbb{R}^3`
     """
-    result = minimize(
-        fun=cost_conic, x0=np.concatenate((R, T)),
-        args=(K, C, p2d, p3dh),
-        method=method
-    )
+    x0 = np.concatenate((np.ravel(R), np.ravel(T)))
+    if method in ('lm', 'trf', 'dogbox'):
+        result = least_squares(
+            fun=residual_conic, x0=x0, args=(K, C, p2d, p3dh), method=method
+        )
+    else:
+        result = minimize(
+            fun=cost_conic, x0=x0, args=(K, C, p2d, p3dh), method=method
+        )
     return result.x[:3], result.x[3:]
 
 
 def optimise_triplet_c2c(
     R1, T1, R2, T2, R3, T3, K1, K2, K3, C1, C2, C3, p2d1, p2d2, p2d3, p3dh,
-    force_circle
+    force_circle, method='lm'
 ):
     """
     Optimise three camera extrinsic parameters by measuring the ellipse (conic)\
@@ -1615,6 +1884,10 @@ def optimise_triplet_c2c(
             for the PnP problem, shape (n, 3)
         force_circle (bool): if True, the cost function will force the\
             reconstructed conic to be a circle.
+        method (str): the name of the optimisation method. The residuals are\
+            minimised with `scipy.optimize.least_squares` for 'lm', 'trf'\
+            and 'dogbox', otherwise the cost is minimised with\
+            `scipy.optimize.minimize`.
 
     Return:
         tuple: the optimised :math:`\\mathbf{R} \\in so(3)` and\
@@ -1622,22 +1895,43 @@ def optimise_triplet_c2c(
 
     """
     RT123 = np.concatenate((R1, T1, R2, T2, R3, T3))
-    if force_circle:
-        result = minimize(
-            fun=cost_circle_triple, x0=RT123,
-            args=(K1, K2, K3, C1, C2, C3, p2d1, p2d2, p2d3, p3dh)
+    args = (K1, K2, K3, C1, C2, C3, p2d1, p2d2, p2d3, p3dh)
+    if method in ('lm', 'trf', 'dogbox'):
+        if force_circle:
+            residual = residual_circle_triple
+        else:
+            residual = residual_conic_triple
+        result = least_squares(
+            fun=residual, x0=RT123, args=args, method=method
         )
     else:
-        result = minimize(
-            fun=cost_conic_triple, x0=RT123,
-            args=(K1, K2, K3, C1, C2, C3, p2d1, p2d2, p2d3, p3dh)
-        )
+        if force_circle:
+            cost = cost_circle_triple
+        else:
+            cost = cost_conic_triple
+        result = minimize(fun=cost, x0=RT123, args=args, method=method)
     opt = result.x
     return opt.reshape((6, 3), order="C")
 
 
+def __get_homogeneous(p3d):
+    """
+    Get the homogeneous representations of 3d points, filled into one array
+
+    Args:
+        p3d (numpy.ndarray): the 3d locations, shape (n, 3)
+
+    Return:
+        numpy.ndarray: the homogeneous locations, shape (n, 4)
+    """
+    p3dh = np.empty((p3d.shape[0], 4), dtype=np.float64)
+    p3dh[:, :3] = p3d
+    p3dh[:, 3] = 1.0
+    return p3dh
+
+
 def get_optimised_camera_c2c(
-    camera, conic_mat, p2d, p3d, method='Nelder-Mead'
+    camera, conic_mat, p2d, p3d, method='lm'
 ):
     """
     Optimise the extrinsic parameter of the camera with a known 3D circle.
@@ -1657,13 +1951,47 @@ def get_optimised_camera_c2c(
     R = camera.rotation.as_rotvec()
     T = camera.t
     K = camera.k
-    p3dh = np.concatenate((p3d, np.ones((len(p3d), 1))), axis=1)
+    p3dh = __get_homogeneous(p3d)
     opt = optimise_c2c(
-        R, T, K, camera.undistort_points(p2d), p3dh, conic_mat, method
+        R, T, K, C=conic_mat, p2d=camera.undistort_points(p2d), p3dh=p3dh,
+        method=method
     )
     return get_updated_camera(camera, *opt)
 
 
+def __solve_pnp(camera, p2d, p3d):
+    """
+    Solve the PnP problem for one camera, whose intrinsic parameters\
+        were calibrated.
+
+    Args:
+        camera (Camera): a calibrated camera
+        p2d (numpy.ndarray): the *distorted* 2d locations, shape (n, 2)
+        p3d (numpy.ndarray): the 3d locations, shape (n, 3)
+
+    Return:
+        tuple: the rotation vector :math:`\\in so(3)` and the translation\
+            vector :math:`\\in \\mathbb{R}^3`, both with shape (3,)
+    """
+    # the closed-form SQPnP solution seeds the Levenberg-Marquardt refinement
+    _, R, T = cv2.solvePnP(
+        objectPoints=p3d[None, :, :],
+        imagePoints=p2d,
+        cameraMatrix=camera.k,
+        distCoeffs=camera.distortion,
+        flags=cv2.SOLVEPNP_SQPNP
+    )
+    _, R, T = cv2.solvePnP(
+        objectPoints=p3d[None, :, :],
+        imagePoints=p2d,
+        cameraMatrix=camera.k,
+        distCoeffs=camera.distortion,
+        rvec=R, tvec=T, useExtrinsicGuess=True,
+        flags=cv2.SOLVEPNP_ITERATIVE
+    )
+    return R.ravel(), T.ravel()
+
+
 def get_optimised_camera_triplet(cameras, p2ds, p3d):
     """
     Optimise 3 cameras with 2D-3D correspondances
@@ -1677,28 +2005,17 @@ def get_optimised_camera_triplet(cameras, p2ds, p3d):
         list: three cameras whose extrinsic parameters were optimised
             with the circle-to-conic correspondances.
     """
-    p3dh = np.concatenate((p3d, np.ones((p3d.shape[0], 1))), axis=1)
-    R_opt, T_opt = [], []
-    for i, cam in enumerate(cameras):
-        _, R, T = cv2.solvePnP(
-            objectPoints=p3d[None, :, :],
-            imagePoints=p2ds[i],
-            cameraMatrix=cam.k,
-            distCoeffs=cam.distortion,
-            flags=cv2.SOLVEPNP_ITERATIVE
-        )
-        R = R.ravel()
-        T = T.ravel()
-        R_opt.append(R)
-        T_opt.append(T)
-
-    return [
-        get_updated_camera(c, r, t) for c, r, t in zip(cameras, R_opt, T_opt)
-    ]
+    # solvePnP releases the GIL, so the cameras are solved in threads
+    RT_pnp = Parallel(n_jobs=len(cameras), prefer="threads")(
+        delayed(__solve_pnp)(cam, p2d, p3d) for cam, p2d in zip(cameras, p2ds)
+    )
+    R_opt = [R for R, T in RT_pnp]
+    T_opt = [T for R, T in RT_pnp]
+    return get_updated_cameras(cameras, R_opt, T_opt)
 
 
 def get_optimised_camera_triplet_c2c(
-    cameras, conic_matrices, p2ds, p3d, force_circle, method="Nelder-Mead"
+    cameras, conic_matrices, p2ds, p3d, force_circle, method="lm"
 ):
     """
     Optimise 3 cameras with 2D-3D correspondances as well as a measured
@@ -1717,40 +2034,32 @@ def get_optimised_camera_triplet_c2c(
         list: three cameras whose extrinsic parameters were optimised
             with the circle-to-conic correspondances.
     """
-    p3dh = np.concatenate((p3d, np.ones((p3d.shape[0], 1))), axis=1)
+    p3dh = __get_homogeneous(p3d)
+    # solvePnP releases the GIL, so the cameras are solved in threads
+    RT_pnp = Parallel(n_jobs=len(cameras), prefer="threads")(
+        delayed(__solve_pnp)(cam, p2d, p3d) for cam, p2d in zip(cameras, p2ds)
+    )
+    p2ds_undist = [c.undistort_points(p) for c, p in zip(cameras, p2ds)]
     RT, K = [], []
     for i, cam in enumerate(cameras):
-        _, R, T = cv2.solvePnP(
-            objectPoints=p3d[None, :, :],
-            imagePoints=p2ds[i],
-            cameraMatrix=cam.k,
-            distCoeffs=cam.distortion,
-            flags=cv2.SOLVEPNP_ITERATIVE
-        )
+        R, T = RT_pnp[i]
         if force_circle:
             R, T =optimise_c2c(
                 R, T, K=cam.k, C=conic_matrices[i],
-                p2d=cam.undistort_points(p2ds[i]),
-                p3dh=p3dh,
+                p2d=p2ds_undist[i],
+                p3dh=p3dh, method=method
             )
-        else:
-            R = R.ravel()
-            T = T.ravel()
         RT.append(R)
         RT.append(T)
         K.append(cam.k)
 
     r1, t1, r2, t2, r3, t3 = optimise_triplet_c2c(
-        *RT, *K, *conic_matrices,
-        *[c.undistort_points(p) for c, p in zip(cameras, p2ds)],
-        p3dh, force_circle
+        *RT, *K, *conic_matrices, *p2ds_undist, p3dh, force_circle, method
     )
 
     R_opt = [r1, r2, r3]
     T_opt = [t1, t2, t3]
-    return [
-        get_updated_camera(c, r, t) for c, r, t in zip(cameras, R_opt, T_opt)
-    ]
+    return get_updated_cameras(cameras, R_opt, T_opt)
 
 
 def get_cost_camera_triplet_c2c(cameras, conic_matrices, p2ds, p3d):
@@ -1767,22 +2076,45 @@ def get_cost_camera_triplet_c2c(cameras, conic_matrices, p2ds, p3d):
     Return:
         float: the reprojected geometrical error.
     """
-    p3dh = np.concatenate((p3d, np.ones((p3d.shape[0], 1))), axis=1)
-    RT, K = [], []
-    for i, cam in enumerate(cameras):
-        RT.append(Rotation.from_matrix(cam.r).as_rotvec())
-        RT.append(cam.t)
-        K.append(cam.k)
-    RT = np.concatenate(RT)
+    p3dh = __get_homogeneous(p3d)
+    rvecs = Rotation.from_matrix(np.array([c.r for c in cameras])).as_rotvec()
+    tvecs = np.array([np.ravel(c.t) for c in cameras])
+    RT = np.concatenate((rvecs, tvecs), axis=1).ravel()  # (R1, T1, R2, ...)
+    K = [c.k for c in cameras]
     return cost_conic_triple(RT, *K, *conic_matrices, *p2ds, p3dh)
 
 
+def update_camera(camera, R, T):
+    """
+    Update the rotation and translation of a camera in place.
+
+    Args:
+        camera (Camera): the camera to be updated
+        R (numpy.ndarray or Rotation): the new rotation vector\
+            :math:`\\in so(3)`, or the new rotation itself
+        T (numpy.ndarray): the new translation vector\
+            :math:`\\in \\mathbb{R}^3`
+
+    Return:
+        Camera: the same `Camera` instance, whose extrinsic parameters\
+            were updated.
+    """
+    if isinstance(R, Rotation):
+        camera.rotation = R
+    else:
+        camera.rotation = Rotation.from_rotvec(np.ravel(R))
+    camera.t = np.array(T, dtype=np.float64).ravel()
+    camera.update()
+    return camera
+
+
 def get_updated_camera(camera, R, T):
     """
     Get the updated camera with new rotation and translation.
 
     Args:
-        R (numpy.ndarray): the new rotation vector :math:`\\in so(3)`
+        R (numpy.ndarray or Rotation): the new rotation vector\
+            :math:`\\in so(3)`, or the new rotation itself
         T (numpy.ndarray): the new translation vector\
             :math:`\\in \\mathbb{R}^3`
 
@@ -1791,12 +2123,29 @@ def get_updated_camera(camera, R, T):
             were updated.
     """
     new_cam = Camera()
-    new_cam.k = camera.k.copy()
+    new_cam.k[:] = camera.k  # fill the buffer allocated by Camera()
     new_cam.distortion = camera.distortion.copy()
-    new_cam.rotation = Rotation.from_rotvec(R.ravel())
-    new_cam.t = T.ravel().copy()
-    new_cam.update()
-    return new_cam
+    return update_camera(new_cam, R, T)
+
+
+def get_updated_cameras(cameras, R, T):
+    """
+    Get the updated cameras with new rotations and translations, the\
+        rotation vectors of all cameras are converted together.
+
+    Args:
+        cameras (list): the cameras to be updated, with length n
+        R (numpy.ndarray or Rotation): the new rotation vectors\
+            :math:`\\in so(3)` with shape (n, 3), or the n new rotations
+        T (numpy.ndarray): the new translation vectors, shape (n, 3)
+
+    Return:
+        list: new `Camera` instances whose extrinsic parameters\
+            were updated.
+    """
+    if not isinstance(R, Rotation):
+        R = Rotation.from_rotvec(np.reshape(R, (-1, 3)))
+    return [get_updated_camera(c, r, t) for c, r, t in zip(cameras, R, T)]
 
 
 def get_relative_euclidean_transform(Rotations, Translations, index):
@@ -1818,8 +2167,12 @@ def get_relative_euclidean_transform(Rotations, Translations, index):
     n_measure, n_view = Rotations.shape[:2]
     R0 = Rotations[:, index, :, :]  # (n_measure, 3, 3)
     T0 = Translations[:, index, :]  # (n_measure, 3,)
-    Rij = np.einsum('nmik,njk->nmij', Rotations, R0)  # R = Ri @ R0^T
-    Tij = Translations - np.einsum('nmik,nk->nmi', Rij, T0)  # T = Ti - R @ T0
+    if n_measure == 1:  # nothing to be averaged
+        Rij = Rotations[0] @ R0[0].T  # (n_view, 3, 3)
+        Tij = Translations[0] - Rij @ T0[0]  # (n_view, 3,)
+        return Rij, Tij
+    Rij = Rotations @ R0[:, None].swapaxes(-1, -2)  # R = Ri @ R0^T
+    Tij = Translations - (Rij @ T0[:, None, :, None])[..., 0]  # Ti - R @ T0
     Rij = np.mean(Rij, axis=0)  # (n_view, 3, 3)
     Tij = np.mean(Tij, axis=0)  # (n_view, 3,)
     return Rij, Tij
@@ -1843,25 +2196,26 @@ def get_cameras_with_averaged_euclidean_transform(cameras, index):
     """
     n_measure = len(cameras)
     n_view = len(cameras[0])
-    Rotations = np.empty((n_measure, n_view, 3, 3))
-    Translations = np.empty((n_measure, n_view, 3))
-    for i in range(n_measure):
-        for j in range(n_view):
-            Rotations[i, j, :, :] = cameras[i][j].r
-            Translations[i, j, :] = cameras[i][j].t
+    Rotations = np.array(  # (n_measure, n_view, 3, 3)
+        [[c.r for c in ensemble] for ensemble in cameras], dtype=np.float64
+    )
+    Translations = np.array(  # (n_measure, n_view, 3)
+        [[c.t.ravel() for c in ensemble] for ensemble in cameras],
+        dtype=np.float64
+    )
     Rij, Tij = get_relative_euclidean_transform(Rotations, Translations, index)
     R0, T0 = Rotations[:, index, :, :], Translations[:, index, :]
-    Ri = np.einsum('mik,nkj->nmij', Rij, R0)  # (n_measure, n_view, 3, 3)
-    Ti = np.einsum('mik,nk->nmi', Rij, T0) + Tij  # (n_measure, n_view, 3)
-    cameras_updated = []
-    for i in range(n_measure):
-        ensemble = []
-        for j in range(n_view):
-            r = Rotation.from_matrix(Ri[i, j]).as_rotvec()
-            t = Ti[i, j]
-            ensemble.append(get_updated_camera(cameras[i][j], r, t))
-        cameras_updated.append(ensemble)
-    return cameras_updated
+    Ri = Rij[None] @ R0[:, None]  # (n_measure, n_view, 3, 3)
+    Ti = (Rij[None] @ T0[:, None, :, None])[..., 0] + Tij  # (..., 3)
+    rotations = Rotation.from_matrix(Ri.reshape(-1, 3, 3))
+    cameras_updated = get_updated_cameras(
+        [c for ensemble in cameras for c in ensemble],
+        rotations, Ti.reshape(-1, 3)
+    )
+    return [
+        cameras_updated[i * n_view : (i + 1) * n_view]
+        for i in range(n_measure)
+    ]
 
 
 def remove_camera_triplet_outliers(camera_triplets, threshold):
@@ -1879,19 +2233,25 @@ def remove_camera_triplet_outliers(camera_triplets, threshold):
         list: a collection of tuples with 3 cameras, where outlier triplets\
             were discarded.
     """
-    Rotations = np.array([[c.r for c in trip] for trip in camera_triplets])
-    Translations = np.array([[c.t for c in trip] for trip in camera_triplets])
+    Rotations = np.array(  # (n_measure, 3, 3, 3)
+        [[c.r for c in trip] for trip in camera_triplets], dtype=np.float64
+    )
+    Translations = np.array(  # (n_measure, 3, 3)
+        [[c.t.ravel() for c in trip] for trip in camera_triplets],
+        dtype=np.float64
+    )
     R0 = Rotations[:, 0, :, :]  # (n_measure, 3, 3)
     T0 = Translations[:, 0, :]  # (n_measure, 3,)
-    Rij = np.einsum('nmik,njk->nmij', Rotations, R0)  # R = Ri @ R0^T
-    Tij = Translations - np.einsum('nmik,nk->nmi', Rij, T0)  # T = Ti - R @ T0
-
-    R12 = Rotation.from_matrix(Rij[:, 1]).as_rotvec()
-    R13 = Rotation.from_matrix(Rij[:, 2]).as_rotvec()
-    Z = np.concatenate((R12, R13, Tij[:, 1], Tij[:, 2]), axis=1)
-    Z = np.abs((Z - Z.mean(axis=0)[None, :]) / Z.std(axis=0)[None, :])
-    result = []
-    for ct, z in zip(camera_triplets, Z.max(axis=1)):
-        if z < threshold:
-            result.append(ct)
-    return result
+    Rij = Rotations @ R0[:, None].swapaxes(-1, -2)  # R = Ri @ R0^T
+    Tij = Translations - (Rij @ T0[:, None, :, None])[..., 0]  # Ti - R @ T0
+
+    rvecs = Rotation.from_matrix(Rij[:, 1:3].reshape(-1, 3, 3)).as_rotvec()
+    rvecs = rvecs.reshape(-1, 6)  # (n_measure, [R12, R13])
+    Z = np.concatenate((rvecs, Tij[:, 1], Tij[:, 2]), axis=1)
+    mean, std = Z.mean(axis=0), Z.std(axis=0)
+    np.subtract(Z, mean, out=Z)
+    np.divide(Z, std, out=Z)
+    np.abs(Z, out=Z)
+    return [
+        ct for ct, z in zip(camera_triplets, Z.max(axis=1)) if z < threshold
+    ]
@@ -2,9 +2,10 @@
 import pickle
 from . import tower_sample as ts
 import warnings
+from functools import lru_cache
 from itertools import product
 import numpy as np
-from scipy.optimize import least_squares, curve_fit
+from scipy.optimize import curve_fit
 from scipy.spatial import ConvexHull
 from scipy.special import gamma
 from scipy import ndimage
@@ -14,6 +15,7 @@ from matplotlib import cm
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from numba import njit
+from joblib import Parallel, delayed
 
 
 @njit
@@ -40,7 +42,6 @@ def pairwise_dot(x):
     return result
 
 
-@njit
 def get_acf(var, size=0, step=1):
     r"""
     Calculate the auto-correlation function for a n-dimensional variable
@@ -60,29 +61,30 @@ def get_acf(var, size=0, step=1):
 
     Return:
         :obj:`numpy.ndarray`: The auto-correlation function of the variable
+
+    Note:
+        The correlation of all :math:`\tau` were obtained together with FFT
+        (Wiener–Khinchin theorem), rather than one :math:`\tau` at a time.
+        Time points where the variable is ``nan`` were ignored.
     """
     length = len(var)
     if size == 0:
         size = length
-    dim = var.shape[1]
-    mean = np.empty((1, dim), dtype=np.float64)
-    for d in range(dim):
-        mean[0, d] = np.nanmean(var[:, d])
-    flctn = var - mean  # (n, dim) - (1, dim)
-    result = np.empty(size, dtype=np.float64)
-    for dt in range(0, size):
-        stop = length - dt
-        corr = np.sum(
-            flctn[:stop:step] * flctn[dt:stop + dt:step],
-            axis=1
-        )
-        c0 = np.sum(
-            flctn[:stop:step] * flctn[:stop:step], axis=1
-        )  # normalisation factor
-        if np.nansum(c0) == 0:
-            result[dt] = np.nan
-        else:
-            result[dt] = np.nansum(corr) / np.nansum(c0)
+    flctn = var - np.nanmean(var, axis=0)[np.newaxis, :]  # (n, dim) - (1, dim)
+    flctn[np.isnan(flctn).any(axis=1)] = 0
+    origins = np.zeros((length, 1), dtype=np.float64)
+    origins[::step] = 1
+    flctn_0 = flctn * origins  # fluctuations at the chosen t0
+
+    n_fft = 1 << (2 * length - 1).bit_length()  # zero-padding, avoid wrapping
+    spec = np.conj(np.fft.rfft(flctn_0, n_fft, axis=0)) * np.fft.rfft(flctn, n_fft, axis=0)
+    corr = np.fft.irfft(spec, n_fft, axis=0)[:length].sum(axis=1)
+    c0 = np.cumsum(np.sum(flctn_0 * flctn_0, axis=1))[::-1]  # normalisation factor
+
+    result = np.full(size, np.nan, dtype=np.float64)
+    n_valid = min(size, length)
+    is_valid = c0[:n_valid] != 0
+    result[:n_valid][is_valid] = corr[:n_valid][is_valid] / c0[:n_valid][is_valid]
     return result
 
 
@@ -102,31 +104,112 @@ def get_msd(trajectories, size, step=1):
     return np.arange(0, size), msd
 
 
-def get_acf_fft(var, size, nstep, nt):
+class TrajectoryTable:
     """
-    not finished
+    Many trajectories stored as a few contiguous arrays, so that quantities\
+        of all frames can be calculated with vectorised numpy functions,\
+        rather than looping over the trajectories frame by frame
+
+    The rows were sorted by the trajectory label, then by the time
+
+    Attributes:
+        time (:obj:`numpy.ndarray`): the frame number of each position, shape (n,)
+        positions (:obj:`numpy.ndarray`): all the positions, shape (n, dim)
+        labels (:obj:`numpy.ndarray`): the trajectory of each position, shape (n,)\
+            label ``i`` corresponds to ``trajs[i]``
+        frames (:obj:`numpy.ndarray`): the sorted unique frame numbers
     """
-    fft_len = 2 * size  # Actual length of FFT data
+    def __init__(self, trajs):
+        """
+        Args:
+            trajs (:obj:`list` of :class:`Trajectory`): the trajectories
+        """
+        time = self.__get_frame_numbers(np.concatenate([t.time for t in trajs]))
+        positions = np.concatenate([t.positions for t in trajs])
+        labels = np.repeat(np.arange(len(trajs)), [len(t.time) for t in trajs])
+        order = np.lexsort((time, labels))
+        self.time = time[order]
+        self.positions = positions[order]
+        self.labels = labels[order]
+        self.frames = np.unique(self.time)
 
-    # Prepare data for FFT
-    fft_inp = np.zeros(fft_len, dtype=np.complex_)
-    fft_inp[0:nstep] = var
+    def __len__(self):
+        return len(self.time)
 
-    fft_out = np.fft.fft(fft_inp)  # Forward FFT
-    fft_out = fft_out * np.conj(fft_out)  # Square modulus
-    fft_inp = np.fft.ifft(fft_out)  # Backward FFT
-    # Normalization factors associated with number of time origins
-    n = np.linspace(nstep, nstep - nt, nt + 1, dtype=np.float_)
-    assert np.all(n > 0.5), 'Normalization array error'
-    c_fft = fft_inp[0:nt + 1].real / n
-    return c_fft
+    @staticmethod
+    def __get_frame_numbers(frames):
+        """
+        Convert frame numbers into an int64 array, as they are used as\
+            indices. Float numbers are accepted if they are integers.
+        """
+        frames = np.asarray(frames)
+        frame_numbers = frames.astype(np.int64)
+        if not np.array_equal(frame_numbers, frames):
+            raise ValueError("The frame numbers should be integers")
+        if np.any(frame_numbers < 0):
+            raise ValueError("The frame numbers should not be negative")
+        return frame_numbers
+
+    def get_traj_nums(self, frames):
+        """
+        count the number of trajectories in different frames
+        """
+        frames = self.__get_frame_numbers(frames)
+        numbers = np.bincount(
+            self.time,
+            minlength=max(np.max(frames, initial=0), np.max(self.time)) + 1
+        )
+        return numbers[frames]
+
+    def get_frame_positions(self):
+        """
+        Return:
+            :obj:`list` of :obj:`numpy.ndarray`: the positions in each\
+                of ``self.frames``, ordered by the trajectory labels
+        """
+        order = np.argsort(self.time, kind='stable')
+        counts = np.bincount(self.time)[self.frames]
+        return np.split(self.positions[order], np.cumsum(counts)[:-1])
+
+    def get_centres(self, frames):
+        """
+        calculate the centres of many frames at once, the result is ``nan``\
+            for a frame without positions
+        """
+        frames = self.__get_frame_numbers(frames)
+        size = max(np.max(frames, initial=0), np.max(self.time)) + 1
+        total = np.zeros((size, self.positions.shape[1]), dtype=np.float64)
+        np.add.at(total, self.time, self.positions)
+        counts = np.bincount(self.time, minlength=size)[frames]
+        if np.any(counts == 0):
+            warn(f"No positions found in frame {frames[counts == 0]}")
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return total[frames] / counts[:, np.newaxis]
+
+    def get_centre_moves(self, frames):
+        """
+        calculate the movements of the centre from ``[frame]`` to\
+            ``[frame + 1]`` for many frames at once, only the trajectories\
+            who has foodsteps in both frames were used. The result is\
+            ``nan`` for a frame where no trajectory has foodsteps in both frames
+        """
+        frames = self.__get_frame_numbers(frames)
+        is_next = (np.diff(self.time) == 1) & (np.diff(self.labels) == 0)
+        starts = self.time[:-1][is_next]
+        movements = np.diff(self.positions, axis=0)[is_next]
+        size = max(np.max(frames, initial=0), np.max(starts, initial=0)) + 1
+        total = np.zeros((size, movements.shape[1]), dtype=np.float64)
+        np.add.at(total, starts, movements)
+        counts = np.bincount(starts, minlength=size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (total / counts[:, np.newaxis])[frames]
 
 
 def get_centre(trajectories, frame):
     positions = []
     for t in trajectories:
-        if frame in t.time:
-            index = np.where(t.time == frame)[0][0]
+        index = t.time_index.get(frame)
+        if index is not None:
             positions.append(t.positions[index])
     if len(positions) > 0:
         return np.mean(positions, 0)
@@ -141,28 +224,52 @@ def get_centre_move(trajectories, frame):
     """
     movements = []
     for t in trajectories:
-        if (frame in t.time) and (frame + 1 in t.time):
-            index_1 = np.where(t.time == frame)[0][0]
-            index_2 = np.where(t.time == frame + 1)[0][0]
+        index_1 = t.time_index.get(frame)
+        index_2 = t.time_index.get(frame + 1)
+        if (index_1 is not None) and (index_2 is not None):
             movements.append(t.positions[index_2] - t.positions[index_1])
     return np.mean(movements, axis=0)
 
 
+def get_centre_moves(trajectories, frames):
+    """
+    calculate the movements of the centre from ``[frame]`` to ``[frame + 1]``
+    for many frames at once, see :func:`get_centre_move` and
+    :meth:`TrajectoryTable.get_centre_moves`
+    """
+    return TrajectoryTable(trajectories).get_centre_moves(frames)
+
+
 def get_centres(trajectories, frames):
-    centres = np.empty((len(frames), 3), dtype=np.float64)
-    for i, frame in enumerate(frames):
-        centres[i] = get_centre(trajectories, frame)
-    return centres
+    """
+    calculate the centres of many frames at once, see :func:`get_centre`
+    and :meth:`TrajectoryTable.get_centres`
+    """
+    return TrajectoryTable(trajectories).get_centres(frames)
+
+
+@njit
+def __get_best_rotation(r1, r2):
+    """
+    The jitted kernel of :func:`get_best_rotation`, for contiguous float64\
+        arrays
+    """
+    u, s, vh = np.linalg.svd(r1.T @ r2)
+    sign = np.ones(r1.shape[1])
+    if np.linalg.det(u @ vh) < 0:
+        sign[-1] = -1
+    return (u * sign) @ vh
 
 
 def get_best_rotation(r1, r2):
     """
     Calculate the best rotation to relate two sets of vectors
 
-    See the paper [A solution for the best rotation to relate\
-        two sets of vectors] for detail
+    The rotation is obtained from the SVD of the covariance matrix
+        (the Kabsch algorithm), and the sign of its last singular vector
+        is flipped if needed, so that the result is a proper rotation
 
-    all the points were treated equally, which means w_n = 0 (in the paper)
+    all the points were treated equally
 
     Args:
         r1 (:obj:`numpy.ndarray`): a collection of 3D points, shape (n, 3)
@@ -171,13 +278,12 @@ def get_best_rotation(r1, r2):
     Return:
         :obj:`numpy.ndarray`: the best rotation matrix R, ``r1 @ R = r2``
     """
-    R = r2.T @ r1
-    u, a = np.linalg.eig(R.T @ R)  # a[:, i] corresponds to u[i]
-    b = 1 / np.sqrt(u) * (R @ a)
-    return (b @ a.T).T
+    r1 = np.ascontiguousarray(r1, dtype=np.float64)
+    r2 = np.ascontiguousarray(r2, dtype=np.float64)
+    return __get_best_rotation(r1, r2)
 
 
-def get_best_dilatation_rotation(r1, r2, init_guess=None):
+def get_best_dilatation_rotation(r1, r2, init_guess=None, max_iter=100, tol=1e-10):
     """
     Calculate the best dilation & rotation matrices between two sets of points
 
@@ -185,54 +291,123 @@ def get_best_dilatation_rotation(r1, r2, init_guess=None):
 
         (r1 @ Lambda) @ Rotation = r2
 
+    The two matrices were optimised alternately, both steps have closed-form
+        solutions
+
+        1. fix Lambda, the best Rotation is from :func:`get_best_rotation`
+        2. fix Rotation, each diagonal element of Lambda is the least-square\
+            solution of ``r1[:, j] * L[j] = (r2 @ Rotation.T)[:, j]``
+
     Args:
         r1 (:obj:`numpy.ndarray`): a collection of 3D positions, shape (N, 3)
         r2 (:obj:`numpy.ndarray`): a collection of 3D positions, shape (N, 3)
-        init_guess (:obj:`bool`): the initial guess for numerical optimisation
+        init_guess (:obj:`numpy.ndarray`): the initial guess of the diagonal\
+            elements of Lambda
+        max_iter (:obj:`int`): the maximum number of alternating steps
+        tol (:obj:`float`): the iteration stops if the squared residual\
+            decreases less than ``tol * sum(r2 ** 2)`` in one step
 
     Return:
         :obj:`tuple`: (dilation matrix Lambda, rotation matrix Rotation)
     """
     if isinstance(init_guess, type(None)):
         init_guess = np.ones(r1.shape[1])
+    r1 = np.ascontiguousarray(r1, dtype=np.float64)
+    r2 = np.ascontiguousarray(r2, dtype=np.float64)
+    L = np.array(init_guess, dtype=np.float64)
+    r1_sq = np.sum(r1 * r1, axis=0)
+    r1_sq[r1_sq == 0] = np.inf  # the dilation is undefined, keep L = 0
+    r2_sq = np.sum(r2 * r2)
+    cost = np.inf
+    for _ in range(max_iter):
+        R = __get_best_rotation(r1 * L, r2)
+        r1_r2 = np.sum(r1 * (r2 @ R.T), axis=0)
+        L = r1_r2 / r1_sq
+        # |r1 @ Lambda - r2 @ R.T|^2 with the optimal Lambda, without the residual
+        cost_new = r2_sq - np.sum(r1_r2 * L)
+        if cost - cost_new <= tol * r2_sq:
+            break
+        cost = cost_new
+    R = __get_best_rotation(r1 * L, r2)
+    return np.diag(L), R
+
+
+@lru_cache(maxsize=2048)
+def __get_convex_hull_cached(points_bytes, dim):
+    """
+    Build the convex hull from the raw bytes of a (n, dim) float64 array,
+        so that the hull of identical points is only calculated once
+    """
+    return ConvexHull(np.frombuffer(points_bytes).reshape(-1, dim))
 
-    def cost(L, r1, r2):
-        Lambda = np.identity(r1.shape[1]) * np.array(L)
-        r1t = r1 @ Lambda
-        R = get_best_rotation(r1t, r2)
-        return np.sum(np.linalg.norm(r2 - r1t @ R))
-
-    result = least_squares(cost, init_guess, args=(r1, r2))
-    L = np.identity(r1.shape[1]) * np.array(result['x'])
-    r1t = r1 @ L
-    R = get_best_rotation(r1t, r2)
-    return L, R
 
+def get_convex_hull_from_trajs(trajectories, target_num=0, cores=1):
+    """
+    Calculate the convex hull of the positions in each frame
 
-def get_convex_hull_from_trajs(trajectories, target_num=0):
-    frames = list(set(np.hstack([t.time for t in trajectories]).ravel()))
-    for frame in frames:
-        points = []
-        for t in trajectories:
-            if frame in t.time:
-                points.append(t.positions[t.time == frame])
-        points = np.squeeze(points)
-        if len(points) >= target_num:
-            yield ConvexHull(np.array(points))
+    Args:
+        trajectories (:obj:`list` of :class:`Trajectory`): the trajectories
+        target_num (:obj:`int`): only frames with at least ``target_num``\
+            positions were considered
+        cores (:obj:`int`): the number of processes to calculate the hulls\
+            of different frames in parallel
+
+    Yield:
+        :obj:`scipy.spatial.ConvexHull`: the convex hull of each frame
+    """
+    frame_positions = [
+        points for points in TrajectoryTable(trajectories).get_frame_positions()
+        if len(points) >= target_num
+    ]
+    if cores > 1:
+        yield from Parallel(n_jobs=cores)(
+            delayed(ConvexHull)(points) for points in frame_positions
+        )
+    else:
+        for points in frame_positions:
+            points = np.ascontiguousarray(points, dtype=np.float64)
+            yield __get_convex_hull_cached(points.tobytes(), points.shape[1])
 
 
 def get_rg_tensor(trajectories, target_num=0):
-    frames = list(set(np.hstack([t.time for t in trajectories]).ravel()))
-    for frame in frames:
-        points = []
-        for t in trajectories:
-            if frame in t.time:
-                points.append(t.positions[t.time == frame])
-        points = np.squeeze(points)
+    for points in TrajectoryTable(trajectories).get_frame_positions():
         if len(points) >= target_num:
             yield np.cov((points - points.mean(0)).T)
 
 
+@njit
+def diffuse_centres(centres, sources, moves, good_frames, good_indices, boundaries):
+    """
+    Fill the centres by accumulating the centre movements, starting from\
+        the good frames, see :class:`GCE`. The ``centres`` were updated inplace
+
+    Args:
+        centres (:obj:`numpy.ndarray`): the centres to be filled, shape (n_frame, dim)
+        sources (:obj:`numpy.ndarray`): the centres in the good frames,\
+            shape (n_good, dim)
+        moves (:obj:`numpy.ndarray`): the movement of the centre from\
+            ``[frame]`` to ``[frame + 1]``, shape (max_frame + 1, dim)
+        good_frames (:obj:`numpy.ndarray`): the good frames, shape (n_good,)
+        good_indices (:obj:`numpy.ndarray`): the indices of the good frames\
+            in the centres, shape (n_good,)
+        boundaries (:obj:`numpy.ndarray`): the boundaries of the regions\
+            around each good frame, shape (n_good + 1,)
+    """
+    for k in range(len(good_frames)):
+        gf, gi = good_frames[k], good_indices[k]
+        centres[gi] = sources[k]
+
+        left = sources[k].copy()  # reversing time, going left <--
+        for i, frame in enumerate(range(gf - 1, boundaries[k] - 1, -1)):
+            left -= moves[frame]
+            centres[gi - i - 1] = left
+
+        right = sources[k].copy()
+        for i, frame in enumerate(range(gf, boundaries[k + 1])):
+            right += moves[frame]
+            centres[gi + i + 1] = right
+
+
 class GCE:
     """
     Estimating the Group Centre, trying to use knowledge of\
@@ -248,13 +423,14 @@ class GCE:
             good_frames: frame number that the group centre can be well estimated
         """
         self.trajs = trajs
-        self.frames = list(set(np.hstack([t.time for t in self.trajs]).ravel()))
+        self.table = TrajectoryTable(trajs)
+        self.frames = self.table.frames
         if len(self.frames) != np.max(self.frames)+1:
             warnings.warn("Missing some frame in all the trajectoreis")
         self.centres = np.zeros((len(self.frames), 3))
 
         if isinstance(good_frames, type(None)):
-            self.centres = get_centres(self.trajs, self.frames)
+            self.centres = self.table.get_centres(self.frames)
         elif isinstance(good_frames, int):
             self.good_frames = self.__detect(good_frames)
             self.__diffuse()
@@ -266,12 +442,7 @@ class GCE:
         """
         count the number of trajectories at each frame
         """
-        numbers = np.zeros(len(self.frames), np.int64)
-        for i, frame in enumerate(self.frames):
-            for traj in self.trajs:
-                if frame in traj.time:
-                    numbers[i] += 1
-        return numbers
+        return self.table.get_traj_nums(self.frames)
 
     def __detect(self, target_num):
         numbers = self.__get_traj_nums()
@@ -299,25 +470,22 @@ class GCE:
             ┊        ┊          ┊          ┊
             ┊────┴───┊────┴─────┊─────┴────┊
         """
+        if len(self.good_frames) == 0:
+            return
         boundaries = [0]
         boundaries += [(i+j)//2 for (i, j) in zip(self.good_frames[:-1], self.good_frames[1:])]
         boundaries.append(np.max(self.frames))
-        ranges = zip(boundaries[:-1], boundaries[1:])
-        for gf, r in zip(self.good_frames, ranges):
-            gi = self.frames.index(gf)  # good index
-            source = get_centre(self.trajs, gf)  # other centres were diffused from the source
-
-            self.centres[gi] = source
-
-            left = source.copy()  # reversing time, going left <--
-            for i, frame in enumerate(range(gf-1, r[0]-1, -1)):
-                left -= get_centre_move(self.trajs, frame)
-                self.centres[gi-i-1] = left
-
-            right = source.copy()
-            for i, frame in enumerate(range(gf, r[1], +1)):
-                right += get_centre_move(self.trajs, frame)
-                self.centres[gi+i+1] = right
+        good_frames = np.asarray(self.good_frames, dtype=np.int64)
+        moves = self.table.get_centre_moves(np.arange(np.max(self.frames) + 1))
+        # other centres were diffused from the sources
+        diffuse_centres(
+            self.centres,
+            sources=self.table.get_centres(good_frames),
+            moves=moves,
+            good_frames=good_frames,
+            good_indices=np.searchsorted(self.frames, good_frames),
+            boundaries=np.array(boundaries, dtype=np.int64),
+        )
 
 
 def maxwell_boltzmann_nd(v, theta, v_sq_mean):
@@ -732,6 +900,7 @@ class Trajectory():
             raise ValueError("Time points do not match the position number")
         self.time = time
         self.length = len(time)
+        self._time_index = None
         if blur:
             self.positions = ndimage.gaussian_filter1d(positions, blur, axis=0)
         else:
@@ -755,6 +924,16 @@ class Trajectory():
     def __len__(self):
         return len(self.positions)
 
+    @property
+    def time_index(self):
+        """
+        :obj:`dict`: the index of each frame number in ``self.time``,\
+            built once and cached for constant-time lookups
+        """
+        if getattr(self, '_time_index', None) is None:
+            self._time_index = {int(f): i for i, f in enumerate(self.time)}
+        return self._time_index
+
     def __repr__(self):
         return f"trajectory@{id(self):x}"
 
@@ -800,6 +979,7 @@ class Trajectory():
                 pos_nd_interp.append(pos_1d_interp)
             self.time = ti
             self.positions = np.vstack(pos_nd_interp).T
+            self._time_index = None
 
     def offset(self, shift):
         """
@@ -808,6 +988,7 @@ class Trajectory():
         self.time += shift
         self.t_start += shift
         self.t_end += shift
+        self._time_index = None
 
 
 class Movie:
@@ -904,15 +1085,17 @@ class Movie:
             label_0 = self.__labels[frame]
             label_1 = self.__labels[frame + 1]
             # the order of labels is the same as the order of the positions
-            label_intersection = [l for l in label_0 if l in label_1]
-
-            if label_intersection:
-                indices_0 = np.array([
-                    np.where(li == label_0)[0][0] for li in label_intersection
-                    ])
-                indices_1 = np.array([
-                    np.where(li == label_1)[0][0] for li in label_intersection
-                    ])
+            if len(label_0) > 0 and len(label_1) > 0:
+                order_1 = np.argsort(label_1)
+                where_1 = np.searchsorted(label_1, label_0, sorter=order_1)
+                where_1 = order_1[np.minimum(where_1, len(label_1) - 1)]
+                is_shared = label_1[where_1] == label_0
+            else:
+                is_shared = np.zeros(len(label_0), dtype=bool)
+
+            if np.any(is_shared):
+                indices_0 = np.flatnonzero(is_shared)
+                indices_1 = where_1[is_shared]
                 velocity[indices_0] = position_1[indices_1] - position_0[indices_0]
             else:
                 indices_0 = np.empty(0)
@@ -929,8 +1112,8 @@ class Movie:
             positions = []
             labels = []
             for i, t in enumerate(self.trajs):
-                if frame in t.time:
-                    time_index = np.where(t.time == frame)[0][0]
+                time_index = t.time_index.get(frame)
+                if time_index is not None:
                     positions.append(t.positions[time_index])
                     labels.append(i)
             if len(positions) == 0:
@@ -35,6 +35,7 @@ kernels = np.load('shape_kernels.npy')
 angles = np.linspace(0, 180, angle_number)
 
 f_out = open('features.pkl', 'wb')
+offsets = []  # the byte offset of each pickled frame, used by link.py
 
 dpi = 150
 
@@ -66,6 +67,7 @@ for frame, image in enumerate(images):
 
     print(maxima.shape[1])
 
+    offsets.append(f_out.tell())
     pickle.dump(maxima, f_out)
 
     x, y, o, s, b, p = maxima
@@ -96,3 +98,4 @@ for frame, image in enumerate(images):
         plt.close()
 
 f_out.close()
+np.save('features_offsets.npy', np.array(offsets, dtype=np.int64))
@@ -11,6 +11,30 @@ import fish_corr as fc
 if 'movie.pkl' in os.listdir('.'):
     exit(0)
 
+
+def get_frame_offsets(filename):
+    """
+    Get the byte offsets of the frames pickled one after another in a file,\
+        the offsets are cached next to the file after the first scan.
+    """
+    cache = os.path.splitext(filename)[0] + '_offsets.npy'
+    if os.path.isfile(cache) and \
+            os.path.getmtime(cache) >= os.path.getmtime(filename):
+        return np.load(cache)
+    offsets = []
+    with open(filename, 'rb') as f:
+        while True:
+            offset = f.tell()
+            try:
+                pickle.load(f)
+            except EOFError:
+                break
+            offsets.append(offset)
+    offsets = np.array(offsets, dtype=np.int64)
+    np.save(cache, offsets)
+    return offsets
+
+
 filename = "features.pkl"
 conf = configparser.ConfigParser(allow_no_value=True)
 conf.read('configure.ini')
@@ -28,22 +52,17 @@ relink_window = int(conf['link']['relink_window'])
 ratio_px_to_mm = float(conf['camera']['mm/px'])
 
 # detect total frames
+offsets = get_frame_offsets(filename)
 if frame_end == 0:
-    with open(filename, 'rb') as f:
-        while True:
-            try:
-                pickle.load(f)
-                frame_end += 1
-            except EOFError:
-                break
+    frame_end = len(offsets)
 
 frame_number = frame_end - frame_start
 
 if 'vanilla_trajs.pkl' not in os.listdir("."):
     frames = []
     with open(filename, 'rb') as f:
-        for _ in range(frame_start):
-            pickle.load(f)
+        if frame_number > 0:  # jump to frame_start without unpickling
+            f.seek(offsets[frame_start])
         for _ in range(0, frame_number):
             # shape of oishi features: (6, n)
             pos_xy = pickle.load(f)[:2].T
@@ -70,6 +89,8 @@ if f'trajectories.pkl' not in os.listdir('.'):
     if len(vanilla_trajs) > 1:
         trajs = ft.relink(vanilla_trajs, 1, 1, blur_velocity=blur)
         for dx in range(2, dx_max + 2):
+            if len(trajs) < 2:  # nothing left to be relinked
+                break
             trajs = ft.relink_by_segments(
                 trajs,
                 window_size=relink_window,
@@ -21,21 +21,24 @@ relink_window = int(conf['link']['relink_window'])
 
 filename = 'locations_3d.pkl'
 
-# detect total frames
-frame_number = 0
-with open(filename, 'rb') as f:
-    while True:
-        try:
-            pickle.load(f)
-            frame_number += 1
-        except EOFError:
-            break
 
-if 'vanilla_trajs.pkl' not in os.listdir("."):
-    frames = []
+def iter_frames(filename):
+    """
+    Yield the frames pickled one after another in a file
+    """
     with open(filename, 'rb') as f:
-        for _ in range(0, frame_number):
-            frames.append(pickle.load(f))
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+if 'vanilla_trajs.pkl' not in os.listdir("."):
+    # the linkers index the frames at random, so they are kept in a list,
+    # which is also used to count the frames without a second pass
+    frames = list(iter_frames(filename))
+    frame_number = len(frames)
 
     if linker_name.lower() == 'trackpy':
         linker = ft.TrackpyLinker(linker_range, 0)
@@ -52,11 +55,15 @@ if 'vanilla_trajs.pkl' not in os.listdir("."):
 else:
     with open(f'vanilla_trajs.pkl', 'rb') as f:
         vanilla_trajs = pickle.load(f)
+    # detect total frames
+    frame_number = sum(1 for _ in iter_frames(filename))
 
 if f'trajectories.pkl' not in os.listdir('.'):
     if len(vanilla_trajs) > 1:
         trajs = ft.relink(vanilla_trajs, 1, 1, blur_velocity=blur)
         for dx in range(2, dx_max + 2):
+            if len(trajs) < 2:  # nothing left to be relinked
+                break
             trajs = ft.relink_by_segments(
                 trajs,
                 window_size=relink_window,
@@ -0,0 +1,63 @@
+import numpy as np
+from fish_3d.utility import resolve_temporal_overlap
+
+
+def get_batches(sizes, length, lag, rng):
+    """
+    Generate trajectory batches with different numbers of trajectories,\
+        some trajectories continue the trajectories in the previous batch
+    """
+    batches = []
+    for n in sizes:
+        batch = []
+        for i in range(n):
+            if (len(batches) > 0) and (i < len(batches[-1])) and (i % 2 == 0):
+                previous = batches[-1][i][0]
+                steps = rng.normal(0, 1, (length - lag, 3)).cumsum(axis=0)
+                positions = np.concatenate(
+                    (previous[-lag:], previous[-1] + steps), axis=0
+                )
+            else:
+                start = rng.uniform(0, 1000, 3)
+                positions = start + rng.normal(0, 1, (length, 3)).cumsum(0)
+            batch.append((positions, rng.random()))
+        batches.append(batch)
+    return batches
+
+
+def test_resolve_temporal_overlap_uneven_batches():
+    rng = np.random.default_rng(0)
+    length, lag = 10, 5
+    for sizes in ([3, 5, 2], [5, 3, 6], [1, 4], [4, 1], [0, 3, 3], [3, 3, 0]):
+        batches = get_batches(sizes, length, lag, rng)
+        trajs, t0s = resolve_temporal_overlap(batches, lag, ntol=3, rtol=0.5)
+        assert len(trajs) == len(t0s)
+        # every merge of two trajectories removes the lag overlapped frames
+        n_in = sum(sizes)
+        n_merge = n_in - len(trajs)
+        frames_out = sum(len(t[0]) for t in trajs)
+        assert frames_out == n_in * length - n_merge * lag
+        # the trajectories in the last batch are not lost
+        last = np.array([t[0][-1] for t in batches[-1]]).reshape(-1, 3)
+        ends = np.array([t[0][-1] for t in trajs]).reshape(-1, 3)
+        for end in last:
+            assert np.isclose(ends, end).all(axis=1).any()
+
+
+def test_resolve_temporal_overlap_tied_pairs():
+    length, lag = 10, 5
+    a = np.arange(length * 3, dtype=np.float64).reshape(length, 3)
+    b = np.concatenate((a[-lag:], a[-1] + a[:length - lag] + 3), axis=0)
+    c = np.concatenate((b[-lag:], b[-1] + a[:length - lag] + 3), axis=0)
+    # identical trajectories give tied pairs, extending more than n_max
+    batches = [[(a, 0.1), (a, 0.1)], [(b, 0.1), (b, 0.1)], [(c, 0.1)]]
+    trajs, t0s = resolve_temporal_overlap(batches, lag, ntol=3, rtol=0.5)
+    assert len(trajs) == 4
+    for traj, t0 in zip(trajs, t0s):
+        assert t0 == 0
+        assert len(traj[0]) == 3 * length - 2 * lag
+
+
+if __name__ == "__main__":
+    test_resolve_temporal_overlap_uneven_batches()
+    test_resolve_temporal_overlap_tied_pairs()
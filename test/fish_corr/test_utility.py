@@ -0,0 +1,81 @@
+import warnings
+import numpy as np
+from fish_corr.utility import Trajectory, TrajectoryTable, GCE
+from fish_corr.utility import get_centre, get_centre_move
+from fish_corr.utility import get_centres, get_centre_moves
+
+
+def get_trajectories(rng):
+    """
+    Generate trajectories with gaps, and a frame (frame 4) that\
+        no trajectory passes through
+    """
+    times = [
+        np.arange(0, 4), np.arange(5, 12),
+        np.array([1, 2, 3, 6, 7, 9]), np.arange(2, 10),
+    ]
+    return [
+        Trajectory(t, rng.normal(0, 1, (len(t), 3)).cumsum(axis=0))
+        for t in times
+    ]
+
+
+def test_trajectory_table_against_loops():
+    rng = np.random.default_rng(0)
+    trajs = get_trajectories(rng)
+    table = TrajectoryTable(trajs)
+    frames = np.arange(14)  # frames 4, 12 and 13 are missing
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        centres = table.get_centres(frames)
+        moves = table.get_centre_moves(frames)
+        for i, f in enumerate(frames):
+            centre = get_centre(trajs, f)
+            if centre is None:
+                assert np.isnan(centres[i]).all()
+            else:
+                assert np.allclose(centres[i], centre)
+            assert np.allclose(
+                moves[i], get_centre_move(trajs, f), equal_nan=True
+            )
+    numbers = [sum(f in t.time_index for t in trajs) for f in frames]
+    assert np.array_equal(table.get_traj_nums(frames), numbers)
+
+
+def test_trajectory_table_empty_frames():
+    trajs = get_trajectories(np.random.default_rng(1))
+    table = TrajectoryTable(trajs)
+    assert table.get_traj_nums([]).shape == (0,)
+    assert table.get_centres([]).shape == (0, 3)
+    assert table.get_centre_moves([]).shape == (0, 3)
+    assert get_centres(trajs, []).shape == (0, 3)
+    assert get_centre_moves(trajs, []).shape == (0, 3)
+
+
+def test_gce_without_good_frames():
+    rng = np.random.default_rng(2)
+    trajs = [
+        Trajectory(np.arange(10), rng.normal(0, 1, (10, 3)).cumsum(axis=0))
+        for _ in range(2)
+    ]
+    gce = GCE(trajs, good_frames=5)
+    assert len(gce.good_frames) == 0
+    assert np.array_equal(gce.centres, np.zeros((10, 3)))
+
+
+def test_gce_with_good_frames():
+    rng = np.random.default_rng(3)
+    trajs = [
+        Trajectory(np.arange(10), rng.normal(0, 1, (10, 3)).cumsum(axis=0))
+        for _ in range(3)
+    ]
+    gce = GCE(trajs, good_frames=3)
+    assert np.array_equal(gce.good_frames, np.arange(10))
+    assert np.allclose(gce.centres, get_centres(trajs, np.arange(10)))
+
+
+if __name__ == "__main__":
+    test_trajectory_table_against_loops()
+    test_trajectory_table_empty_frames()
+    test_gce_without_good_frames()
+    test_gce_with_good_frames()